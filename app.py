@@ -5,12 +5,30 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import json
+import os
 import time
+import uuid
 import random
 from typing import Dict, List, Any
 import base64
 from io import StringIO
 
+from config.settings import (
+    CATALOG_FILE, FEATURE_WINDOW_MINUTES, INTERVENTION_HISTORY_PAGE_SIZE, PREDICTION_IDLE_BUCKET_MINUTES,
+    PREDICTION_SESSION_BUCKET_MINUTES, PRODUCTS_PER_PAGE
+)
+from data.products import ProductManager, SessionCatalog
+from models.cart_prediction import CartPredictionModel
+from models.feature_store import FeatureStore, UnknownSession
+from models.prediction_cache import PredictionCache
+from models.registry import ModelRegistry
+from services.cart_service import CartService
+from services.cart_store import CartStore
+from services.inactivity_scanner import InactivityScanner
+from services.intervention_scheduler import InterventionScheduler
+from services.intervention_service import InterventionService
+from services.intervention_stats import InterventionLog
+
 # Configure Streamlit page
 st.set_page_config(
     page_title="Click&Cart - AI-Powered E-Commerce Platform",
@@ -70,10 +88,9 @@ st.markdown("""
 
 # Initialize session state
 def initialize_session_state():
-    if 'cart' not in st.session_state:
-        st.session_state.cart = []
     if 'user_data' not in st.session_state:
         st.session_state.user_data = {
+            'id': get_user_id(),
             'name': 'John Doe',
             'email': 'john@example.com',
             'session_start': datetime.now() - timedelta(minutes=2),
@@ -83,13 +100,94 @@ def initialize_session_state():
     if 'orders' not in st.session_state:
         st.session_state.orders = []
     if 'interventions' not in st.session_state:
-        st.session_state.interventions = []
-    if 'products' not in st.session_state:
-        st.session_state.products = get_sample_products()
+        st.session_state.interventions = InterventionLog()
+    if 'active_intervention' not in st.session_state:
+        st.session_state.active_intervention = None
+    if 'product_manager' not in st.session_state:
+        st.session_state.product_manager = SessionCatalog(get_catalog())
+    if 'cart' not in st.session_state:
+        # Restore the saved cart so reconnects and worker restarts don't empty it
+        st.session_state.cart = get_cart_service().load_cart(
+            st.session_state.user_data['id'], st.session_state.product_manager.get_product_by_id
+        )
+        # A restored cart restarts its version count, so drop predictions made for the old one
+        get_prediction_cache().invalidate(st.session_state.user_data['id'])
     if 'chat_messages' not in st.session_state:
         st.session_state.chat_messages = []
-    if 'last_interaction' not in st.session_state:
-        st.session_state.last_interaction = datetime.now()
+    if st.session_state.user_data['id'] not in get_feature_store():
+        start_feature_session()
+
+def start_feature_session():
+    """Register the session with the feature store and the idle scanner"""
+    get_feature_store().start_session(
+        st.session_state.user_data['id'], st.session_state.user_data, st.session_state.cart
+    )
+    get_inactivity_scanner().touch(st.session_state.user_data['id'])
+
+def with_session_features(call):
+    """Call a feature store method for this session, registering it again if it timed out
+
+    The inactivity scanner drops sessions idle past SESSION_TIMEOUT_MINUTES,
+    which can happen between initialize_session_state() and a later read.
+    """
+    user_id = st.session_state.user_data['id']
+    try:
+        return call(user_id)
+    except UnknownSession:
+        start_feature_session()
+        return call(user_id)
+
+def get_user_id():
+    """Stable shopper id, kept in the URL so it survives reconnects and restarts"""
+    if 'uid' not in st.query_params:
+        st.query_params['uid'] = uuid.uuid4().hex
+    return st.query_params['uid']
+
+@st.cache_resource
+def get_cart_service():
+    """Cart service shared by every session, persisting carts to SQLite"""
+    return CartService(store=CartStore())
+
+@st.cache_resource
+def get_feature_store():
+    """Rolling session features, fed by cart and browse events"""
+    return FeatureStore()
+
+@st.cache_resource
+def get_prediction_model():
+    """Abandonment model, hot swapped when a new registry version is promoted"""
+    model = CartPredictionModel(registry=ModelRegistry())
+    model.watch()
+    return model
+
+@st.cache_resource
+def get_prediction_cache():
+    """Latest prediction per user, shared by every session"""
+    return PredictionCache()
+
+@st.cache_resource
+def get_inactivity_scanner():
+    """Background scorer that queues interventions for idle sessions"""
+    return InactivityScanner(
+        get_feature_store(), get_prediction_model(), get_intervention_service(),
+        scheduler=get_intervention_scheduler()
+    )
+
+@st.cache_resource
+def get_intervention_service():
+    return InterventionService()
+
+@st.cache_resource
+def get_intervention_scheduler():
+    """Per-shopper cooldowns and offer rate limits, shared by every session"""
+    return InterventionScheduler()
+
+@st.cache_resource
+def get_catalog():
+    """Catalog shared by every session in this process"""
+    if os.path.exists(CATALOG_FILE):
+        return ProductManager.from_file(CATALOG_FILE)
+    return ProductManager(get_sample_products())
 
 def get_sample_products():
     return [
@@ -156,109 +254,87 @@ def get_sample_products():
     ]
 
 def calculate_cart_prediction():
-    """Calculate cart abandonment prediction using ML-like logic"""
-    if not st.session_state.cart:
-        return None
-    
-    # Calculate factors
-    session_duration = (datetime.now() - st.session_state.user_data['session_start']).total_seconds() / 60
-    cart_value = sum(item['price'] * item['quantity'] for item in st.session_state.cart)
-    time_since_last_interaction = (datetime.now() - st.session_state.last_interaction).total_seconds() / 60
-    
-    probability = 0
-    factors = []
-    
-    # Time-based factors
-    if session_duration > 10:
-        probability += 0.3
-        factors.append('Long session duration')
-    
-    if cart_value > 20000:
-        probability += 0.2
-        factors.append('High cart value')
-    
-    if len(st.session_state.cart) > 3:
-        probability += 0.15
-        factors.append('Many items in cart')
-    
-    if time_since_last_interaction > 1:
-        probability += 0.4
-        factors.append('Inactive for 1+ minute')
-    
-    if st.session_state.user_data['behavior_score'] < 0.5:
-        probability += 0.25
-        factors.append('Low engagement score')
-    
-    if st.session_state.user_data['previous_purchases'] == 0:
-        probability += 0.1
-        factors.append('First-time visitor')
-    
-    probability = min(probability, 1.0)
-    
-    return {
-        'probability': probability,
-        'confidence': random.uniform(0.7, 1.0),
-        'factors': factors,
-        'timestamp': datetime.now()
-    }
+    """Score the session's abandonment risk from its live feature vector
+
+    Reruns reuse the cached prediction until the model or cart changes or
+    the session or idle time crosses into a new bucket.
+    """
+    user_id = st.session_state.user_data['id']
+    model = get_prediction_model()
+    active = model.active
+    session_minutes, idle_minutes = with_session_features(get_feature_store().elapsed)
+    state = (
+        active[2],
+        st.session_state.cart.version,
+        int(session_minutes // PREDICTION_SESSION_BUCKET_MINUTES),
+        int(idle_minutes // PREDICTION_IDLE_BUCKET_MINUTES),
+    )
+    return get_prediction_cache().get_or_compute(
+        user_id, state, lambda: model.predict_from_features(with_session_features(get_feature_store().vector), active)
+    )
+
+def record_cart_change():
+    """Feed the latest cart state to the session's feature store"""
+    with_session_features(lambda user_id: get_feature_store().on_cart_change(user_id, st.session_state.cart))
+    get_inactivity_scanner().touch(st.session_state.user_data['id'])
+
+def record_browse():
+    """Note a browsing action, which postpones the idle check"""
+    with_session_features(get_feature_store().on_browse)
+    get_inactivity_scanner().touch(st.session_state.user_data['id'])
 
 def add_to_cart(product):
-    """Add product to cart"""
-    st.session_state.last_interaction = datetime.now()
-    
-    # Check if product already in cart
-    for item in st.session_state.cart:
-        if item['id'] == product['id']:
-            item['quantity'] += 1
-            return
-    
-    # Add new item to cart
-    cart_item = {
-        'id': product['id'],
-        'name': product['name'],
-        'price': product['price'],
-        'quantity': 1,
-        'image': product['image'],
-        'added_at': datetime.now()
-    }
-    st.session_state.cart.append(cart_item)
+    """Add product to cart; shows why and returns False when a cart limit stops it"""
+    try:
+        get_cart_service().add_to_cart(st.session_state.cart, product)
+    except ValueError as e:
+        st.error(str(e))
+        return False
+    record_cart_change()
+    return True
 
 def remove_from_cart(product_id):
     """Remove product from cart"""
-    st.session_state.cart = [item for item in st.session_state.cart if item['id'] != product_id]
-    st.session_state.last_interaction = datetime.now()
+    get_cart_service().remove_from_cart(st.session_state.cart, product_id)
+    record_cart_change()
 
 def update_cart_quantity(product_id, quantity):
     """Update quantity of item in cart"""
-    for item in st.session_state.cart:
-        if item['id'] == product_id:
-            if quantity <= 0:
-                remove_from_cart(product_id)
-            else:
-                item['quantity'] = quantity
-                st.session_state.last_interaction = datetime.now()
-            break
+    if product_id in st.session_state.cart:
+        get_cart_service().update_quantity(st.session_state.cart, product_id, quantity)
+        record_cart_change()
+
+def reorder(order):
+    """Add every still-available item of a past order to the cart in one pass"""
+    product_manager = st.session_state.product_manager
+    items = []
+    for line in order['items']:
+        product = product_manager.get_product_by_id(line['id'])
+        if product is not None:
+            items.append((product, line['quantity']))
+    get_cart_service().add_many(st.session_state.cart, items)
+    record_cart_change()
 
 def trigger_intervention(prediction):
-    """Trigger intervention based on prediction"""
-    if prediction and prediction['probability'] > 0.6:
-        intervention_types = [
-            {'type': 'discount', 'message': 'Get 15% off your entire order!', 'value': 15},
-            {'type': 'free_shipping', 'message': 'Free shipping on your order!', 'value': 0},
-            {'type': 'limited_time', 'message': 'Limited time: 20% off everything!', 'value': 20},
-            {'type': 'waiting_cart', 'message': 'Your cart is waiting! Complete your purchase before items run out.', 'value': None}
-        ]
-        
-        intervention = random.choice(intervention_types)
-        intervention.update({
-            'id': len(st.session_state.interventions) + 1,
-            'timestamp': datetime.now(),
-            'success': False
-        })
-        
-        st.session_state.interventions.append(intervention)
-        return intervention
-    return None
+    """Issue an intervention for a high-risk prediction if the shopper's offer budget allows"""
+    if not prediction or prediction['probability'] <= prediction['threshold']:
+        return None
+    
+    # Rate limits are checked before any template work
+    user_id = st.session_state.user_data['id']
+    scheduler = get_intervention_scheduler()
+    if not scheduler.ready(user_id):
+        return None
+    
+    # try_acquire checks and charges atomically, as the idle scanner may be sending one too
+    intervention = get_intervention_service().generate_intervention(
+        st.session_state.cart.subtotal, st.session_state.user_data, scheduler.recent_types(user_id),
+        acquire=lambda offer_type: scheduler.try_acquire(user_id, offer_type)
+    )
+    if intervention is None:
+        return None
+    st.session_state.interventions.append(intervention)
+    return intervention
 
 def home_page():
     """Home page with navigation and overview"""
@@ -329,6 +405,10 @@ def home_page():
                 st.session_state.page = "import"
                 st.rerun()
 
+def set_search_query(query):
+    """Fill the shop search box, e.g. from an autocomplete suggestion"""
+    st.session_state.search_query = query
+
 def shopping_page():
     """Shopping page with products and cart"""
     st.title("🛍️ Click&Cart Shopping")
@@ -336,34 +416,58 @@ def shopping_page():
     # Search and filters
     col1, col2, col3 = st.columns([2, 1, 1])
     with col1:
-        search_query = st.text_input("🔍 Search products", placeholder="Search for products...")
+        search_query = st.text_input("🔍 Search products", placeholder="Search for products...", key="search_query")
+        suggestions = st.session_state.product_manager.autocomplete(search_query) if search_query else []
+        if suggestions and search_query not in suggestions:
+            st.caption("Suggestions:")
+            for idx, suggestion in enumerate(suggestions):
+                st.button(suggestion, key=f"suggest_{idx}", on_click=set_search_query, args=(suggestion,))
     with col2:
-        categories = ['All'] + list(set(product['category'] for product in st.session_state.products))
-        selected_category = st.selectbox("📂 Category", categories)
+        # Category counts ignore the category filter, so the current selection can be read up front
+        current_category = st.session_state.get('shop_category', 'All')
+        facets = st.session_state.product_manager.facet_counts(search_query, current_category)
+        # Price buckets cover every product, so they add up to the exact matches in the category
+        fuzzy = bool(search_query) and sum(facets['price'].values()) == 0
+        if fuzzy:
+            # Nothing matched exactly: count, and later list, products tolerating typos such as "samsng"
+            facets = st.session_state.product_manager.facet_counts(search_query, current_category, fuzzy=True)
+        category_counts = facets['category']
+        selected_category = st.selectbox(
+            "📂 Category", st.session_state.product_manager.get_categories(), key="shop_category",
+            format_func=lambda c: c if c == 'All' else f"{c} ({category_counts.get(c, 0)})"
+        )
     with col3:
         sort_by = st.selectbox("🔄 Sort by", ["Featured", "Price: Low to High", "Price: High to Low", "Rating"])
     
-    # Filter products
-    filtered_products = st.session_state.products
-    if search_query:
-        filtered_products = [p for p in filtered_products if search_query.lower() in p['name'].lower()]
-    if selected_category != 'All':
-        filtered_products = [p for p in filtered_products if p['category'] == selected_category]
-    
-    # Sort products
-    if sort_by == "Price: Low to High":
-        filtered_products = sorted(filtered_products, key=lambda x: x['price'])
-    elif sort_by == "Price: High to Low":
-        filtered_products = sorted(filtered_products, key=lambda x: x['price'], reverse=True)
-    elif sort_by == "Rating":
-        filtered_products = sorted(filtered_products, key=lambda x: x['rating'], reverse=True)
+    # Start from the first page whenever the filters change
+    filters = (search_query, selected_category, sort_by)
+    if st.session_state.get('shop_filters') != filters:
+        if 'shop_filters' in st.session_state:
+            record_browse()
+        st.session_state.shop_filters = filters
+        st.session_state.shop_page = 0
+    
+    # Filter and sort products, building only the visible page
+    product_manager = st.session_state.product_manager
+    positions, total_products = product_manager.query_page(
+        search_query, selected_category, sort_by, st.session_state.shop_page, PRODUCTS_PER_PAGE, fuzzy=fuzzy
+    )
+    if fuzzy and total_products:
+        st.caption(f"No exact matches for \"{search_query}\" - showing similar products")
+    page_products = product_manager.get_products(positions)
+    total_pages = max(1, -(-total_products // PRODUCTS_PER_PAGE))
     
     # Display products
-    st.subheader(f"📦 Products ({len(filtered_products)} items)")
+    st.subheader(f"📦 Products ({total_products} items)")
+    price_facets = " · ".join(f"{label} ({count})" for label, count in facets['price'].items() if count)
+    rating_facets = " · ".join(f"⭐ {label} ({count})" for label, count in facets['rating'].items() if count)
+    if price_facets:
+        st.caption(f"💰 {price_facets}")
+        st.caption(rating_facets)
     
     # Product grid
     cols = st.columns(3)
-    for idx, product in enumerate(filtered_products):
+    for idx, product in enumerate(page_products):
         with cols[idx % 3]:
             with st.container():
                 st.image(product['image'], use_column_width=True)
@@ -373,27 +477,49 @@ def shopping_page():
                 st.markdown(f"📝 {product['description'][:100]}...")
                 
                 if st.button(f"🛒 Add to Cart", key=f"add_{product['id']}"):
-                    add_to_cart(product)
-                    st.success(f"Added {product['name']} to cart!")
-                    st.rerun()
+                    if add_to_cart(product):
+                        st.success(f"Added {product['name']} to cart!")
+                        st.rerun()
     
-    # Cart prediction and intervention
-    prediction = calculate_cart_prediction()
-    if prediction and prediction['probability'] > 0.6:
-        intervention = trigger_intervention(prediction)
-        if intervention and not any(i['id'] == intervention['id'] and i['success'] for i in st.session_state.interventions):
-            st.markdown(f"""
-            <div class="intervention-alert">
-                <h4>🎁 Special Offer!</h4>
-                <p>{intervention['message']}</p>
-                <p><strong>Save ₹{sum(item['price'] * item['quantity'] for item in st.session_state.cart) * (intervention['value'] / 100):,.0f} on your order!</strong></p>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            if st.button("✅ Apply Offer", key="apply_offer"):
-                intervention['success'] = True
-                st.success("Offer applied successfully!")
+    # Pagination
+    if total_pages > 1:
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            if st.button("← Previous", key="prev_page", disabled=st.session_state.shop_page == 0):
+                st.session_state.shop_page -= 1
+                record_browse()
                 st.rerun()
+        with col2:
+            st.markdown(f"Page {st.session_state.shop_page + 1} of {total_pages}")
+        with col3:
+            if st.button("Next →", key="next_page", disabled=st.session_state.shop_page >= total_pages - 1):
+                st.session_state.shop_page += 1
+                record_browse()
+                st.rerun()
+    
+    # Cart prediction and intervention. The current offer stays up until it is applied;
+    # new ones come from the idle scanner or a rerun prediction, both rate limited
+    queued = get_inactivity_scanner().take(st.session_state.user_data['id'])
+    st.session_state.interventions.extend(queued)
+    if queued:
+        st.session_state.active_intervention = queued[-1]
+    if st.session_state.active_intervention is None:
+        st.session_state.active_intervention = trigger_intervention(calculate_cart_prediction())
+    
+    intervention = st.session_state.active_intervention
+    if intervention and st.session_state.cart:
+        st.markdown(f"""
+        <div class="intervention-alert">
+            <h4>🎁 Special Offer!</h4>
+            <p>{intervention['message']}</p>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        if st.button("✅ Apply Offer", key="apply_offer"):
+            get_intervention_service().apply_intervention(intervention)
+            st.session_state.active_intervention = None
+            st.success("Offer applied successfully!")
+            st.rerun()
 
 def cart_sidebar():
     """Shopping cart in sidebar"""
@@ -402,23 +528,25 @@ def cart_sidebar():
         
         if not st.session_state.cart:
             st.info("Your cart is empty")
+            if st.session_state.orders and st.button("🔁 Reorder last order", key="reorder_last"):
+                reorder(st.session_state.orders[-1])
+                st.rerun()
             return
         
-        total_items = sum(item['quantity'] for item in st.session_state.cart)
-        cart_value = sum(item['price'] * item['quantity'] for item in st.session_state.cart)
+        cart = st.session_state.cart
+        total_items = cart.item_count
+        cart_value = cart.subtotal
         
         st.metric("Items in Cart", total_items)
         st.metric("Cart Value", f"₹{cart_value:,}")
         
         # Free shipping progress
-        free_shipping_threshold = 20000
-        if cart_value >= free_shipping_threshold:
+        shipping_progress = cart.shipping_progress()
+        if shipping_progress['qualified']:
             st.success("🚚 You qualify for FREE shipping!")
         else:
-            remaining = free_shipping_threshold - cart_value
-            progress = cart_value / free_shipping_threshold
-            st.progress(progress)
-            st.info(f"Add ₹{remaining:,} more for FREE shipping")
+            st.progress(shipping_progress['progress'])
+            st.info(f"Add ₹{shipping_progress['remaining']:,} more for FREE shipping")
         
         st.markdown("---")
         
@@ -450,9 +578,9 @@ def cart_sidebar():
         st.markdown("---")
         
         # Checkout
-        shipping = 0 if cart_value >= free_shipping_threshold else 499
-        tax = cart_value * 0.18
-        total = cart_value + shipping + tax
+        shipping = cart.shipping
+        tax = cart.tax
+        total = cart.total
         
         st.markdown(f"""
         **Order Summary:**
@@ -536,8 +664,8 @@ def checkout_page():
             upi_id = st.text_input("UPI ID", placeholder="yourname@paytm")
         
         elif payment_method == "Cash on Delivery":
-            st.info("You will pay ₹{:,} in cash upon delivery".format(
-                sum(item['price'] * item['quantity'] for item in st.session_state.cart) * 1.18 + 499
+            st.info("You will pay ₹{:,.0f} in cash upon delivery".format(
+                st.session_state.cart.total
             ))
             cod_confirm = st.checkbox("I confirm cash payment on delivery")
         
@@ -572,10 +700,11 @@ def checkout_page():
             st.write(f"**Payment Method:** {st.session_state.payment_method}")
         
         # Order summary
-        cart_value = sum(item['price'] * item['quantity'] for item in st.session_state.cart)
-        shipping = 0 if cart_value >= 20000 else 499
-        tax = cart_value * 0.18
-        total = cart_value + shipping + tax
+        totals = st.session_state.cart.totals()
+        cart_value = totals['subtotal']
+        shipping = totals['shipping']
+        tax = totals['tax']
+        total = totals['total']
         
         st.markdown(f"""
         **Order Summary:**
@@ -606,7 +735,8 @@ def checkout_page():
                 }
                 
                 st.session_state.orders.append(order)
-                st.session_state.cart = []
+                get_cart_service().clear_cart(st.session_state.cart)
+                record_cart_change()
                 st.session_state.checkout_step = 0
                 
                 st.success("🎉 Order placed successfully!")
@@ -631,7 +761,7 @@ def analytics_dashboard():
     
     # Current session metrics
     prediction = calculate_cart_prediction()
-    cart_value = sum(item['price'] * item['quantity'] for item in st.session_state.cart)
+    cart_value = st.session_state.cart.subtotal
     session_duration = (datetime.now() - st.session_state.user_data['session_start']).total_seconds() / 60
     
     # Key metrics
@@ -647,6 +777,18 @@ def analytics_dashboard():
     with col4:
         st.metric("Session Duration", f"{session_duration:.1f} min")
     
+    # Rolling behaviour over the feature window
+    rolling = with_session_features(get_feature_store().rolling)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric(f"Items Added ({FEATURE_WINDOW_MINUTES} min)", rolling['recent_adds'])
+    with col2:
+        st.metric("Add/Remove Ratio", f"{rolling['add_remove_ratio']:.1f}")
+    with col3:
+        st.metric("Idle Time", f"{rolling['idle_minutes']:.1f} min")
+    with col4:
+        st.metric("Cart Value Velocity", f"₹{rolling['value_velocity']:,.0f}/min")
+    
     st.markdown("---")
     
     # Prediction analysis
@@ -688,8 +830,28 @@ def analytics_dashboard():
             st.write(f"**Last Updated:** {prediction['timestamp'].strftime('%H:%M:%S')}")
     
     # Interventions history
+    st.subheader("🎯 Intervention Performance")
+    windows = {"Last hour": 3600, "Last 24 hours": 86400, "All time": None}
+    window = st.selectbox("Window", list(windows), index=2, key="intervention_stats_window")
+    stats_by_type = get_intervention_service().get_intervention_stats_by_type(windows[window])
+    if stats_by_type:
+        st.dataframe(pd.DataFrame([
+            {
+                'Type': offer_type.replace('_', ' ').title(),
+                'Offers': stats['total'],
+                'Applied': stats['successful'],
+                'Success Rate': f"{stats['success_rate']:.1f}%",
+                'Savings': f"₹{stats['total_savings']:,.0f}"
+            }
+            for offer_type, stats in stats_by_type.items()
+        ]), use_container_width=True)
+    
     st.subheader("🎯 Intervention History")
-    if st.session_state.interventions:
+    log = st.session_state.interventions
+    if log:
+        # Only the visible page is turned into a table
+        total_pages = -(-len(log) // INTERVENTION_HISTORY_PAGE_SIZE)
+        page = st.number_input("Page", min_value=1, max_value=total_pages, value=1, key="intervention_page") - 1
         interventions_df = pd.DataFrame([
             {
                 'Type': i['type'].title(),
@@ -698,9 +860,10 @@ def analytics_dashboard():
                 'Success': "✅" if i['success'] else "❌",
                 'Timestamp': i['timestamp'].strftime('%H:%M:%S')
             }
-            for i in st.session_state.interventions
+            for i in log.page(page, INTERVENTION_HISTORY_PAGE_SIZE)
         ])
         st.dataframe(interventions_df, use_container_width=True)
+        st.caption(f"Page {page + 1} of {total_pages} · {len(log)} interventions, newest first")
     else:
         st.info("No interventions triggered yet")
     
@@ -827,12 +990,15 @@ def data_import_page():
                     st.write("**Preview:**")
                     st.dataframe(df.head())
                     
+                    session_only = st.checkbox(
+                        "Only for this session", help="Keep the products out of the catalog other shoppers see"
+                    )
                     if st.button("Import Products"):
                         # Convert to product format
                         new_products = []
                         for _, row in df.iterrows():
                             product = {
-                                'id': str(row.get('id', len(st.session_state.products) + len(new_products) + 1)),
+                                'id': str(row.get('id', len(st.session_state.product_manager.products) + len(new_products) + 1)),
                                 'name': row.get('name', 'Unknown Product'),
                                 'price': float(row.get('price', 0)),
                                 'category': row.get('category', 'General'),
@@ -843,7 +1009,11 @@ def data_import_page():
                             }
                             new_products.append(product)
                         
-                        st.session_state.products.extend(new_products)
+                        if session_only:
+                            st.session_state.product_manager.add_local_products(new_products)
+                        else:
+                            # Imports go to the shared catalog so every session sees them
+                            get_catalog().add_products(new_products)
                         st.success(f"Successfully imported {len(new_products)} products!")
                 
                 except Exception as e:
@@ -870,16 +1040,16 @@ def data_import_page():
         
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Products", len(st.session_state.products))
+            st.metric("Products", len(st.session_state.product_manager.products))
         with col2:
             st.metric("Orders", len(st.session_state.orders))
         with col3:
             st.metric("Interventions", len(st.session_state.interventions))
         
         # Products table
-        if st.session_state.products:
+        if st.session_state.product_manager.products:
             st.write("**Products:**")
-            products_df = pd.DataFrame(st.session_state.products)
+            products_df = pd.DataFrame([product.to_dict() for product in st.session_state.product_manager.products])
             st.dataframe(products_df[['name', 'price', 'category', 'rating']], use_container_width=True)
     
     with tab3:
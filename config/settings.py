@@ -14,15 +14,32 @@ SHIPPING_COST = 499  # ₹499
 ABANDONMENT_THRESHOLD = 0.6  # 60% probability threshold
 INTERVENTION_DELAY_MINUTES = 1  # Trigger interventions after 1 minute of inactivity
 CONFIDENCE_THRESHOLD = 0.7  # Minimum confidence for predictions
+SCANNER_TICK_SECONDS = 5  # How often idle sessions are scored in the background
+SCANNER_BATCH_SIZE = 256  # Most sessions scored per tick
+MODEL_WEIGHTS_PATH = 'models/abandonment.bin'  # Trained by `python -m models.logistic`
+MODEL_REGISTRY_DIR = 'models/registry'  # Versioned weights managed by `python -m models.registry`
+MODEL_RELOAD_SECONDS = 10  # How often workers check the registry for a new version
+PREDICTION_CACHE_SIZE = 10000  # Users whose latest prediction is kept
+PREDICTION_CACHE_TTL_SECONDS = 60
+PREDICTION_IDLE_BUCKET_MINUTES = 1  # Idle time granularity that triggers a rescore
+PREDICTION_SESSION_BUCKET_MINUTES = 5  # Session length granularity that triggers a rescore
 
 # Session Settings
 SESSION_TIMEOUT_MINUTES = 30
 MAX_CART_ITEMS = 50
 MAX_QUANTITY_PER_ITEM = 10
+CART_DB_PATH = 'data/carts.db'  # SQLite (WAL) cart persistence
+CART_FLUSH_INTERVAL_SECONDS = 1.0  # Batch window for coalesced cart writes
+FEATURE_WINDOW_MINUTES = 5  # Window for rolling session features
 
 # UI Settings
 PRODUCTS_PER_PAGE = 12
 MAX_SEARCH_RESULTS = 100
+SEARCH_PREFIX_CACHE_SIZE = 256  # Prefix unions kept per search index (LRU)
+AUTOCOMPLETE_SUGGESTIONS = 5
+AUTOCOMPLETE_TOP_K = 10  # Completions precomputed per prefix
+PRICE_FACET_BUCKETS = [1000, 5000, 10000, 25000, 50000]  # ₹ bucket edges
+RATING_FACET_BUCKETS = [3.0, 4.0, 4.5]
 CHART_HEIGHT = 400
 SIDEBAR_WIDTH = 300
 
@@ -60,12 +77,22 @@ PAGE_CONFIG = {
 SUPPORTED_FILE_TYPES = ['csv', 'json']
 MAX_FILE_SIZE_MB = 10
 MAX_IMPORT_RECORDS = 10000
+CATALOG_FILE = 'data/catalog.bin'  # Memory-mapped catalog built by `python -m data.catalog_file`
 
 # Analytics Settings
 DEFAULT_TIME_RANGES = ['Today', 'This Week', 'This Month', 'Last 3 Months']
 CHART_COLORS = ['#f97316', '#ea580c', '#fb923c', '#fed7aa']
 
 # Intervention Settings
+INTERVENTION_COOLDOWN_SECONDS = 120  # Minimum gap between offers to one shopper
+INTERVENTION_BURST = 3  # Offers a shopper can receive back to back (token bucket size)
+INTERVENTION_REFILL_SECONDS = 600  # One more offer allowed per this many seconds
+INTERVENTION_DEDUPE_SECONDS = 1800  # Don't repeat an offer type within this window
+INTERVENTION_STATS_BUCKET_SECONDS = 3600  # Granularity of windowed intervention stats
+INTERVENTION_STATS_RETENTION_BUCKETS = 24 * 7
+INTERVENTION_HISTORY_PAGE_SIZE = 20
+BANDIT_CART_VALUE_BANDS = [5000, 20000, 50000]  # ₹ edges of the cart-value bands offers are learned per
+BANDIT_PRIOR_STRENGTH = 10  # Observations the INTERVENTION_TYPES weights are worth
 INTERVENTION_TYPES = [
     {
         'type': 'discount',
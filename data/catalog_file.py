@@ -0,0 +1,165 @@
+"""Memory-mapped binary catalog file format
+
+Layout (little-endian):
+    header   magic, version, product count, section count
+    table    (offset, length) of every section, in SECTIONS order
+    sections fixed-width numeric columns, then an offsets array and a
+             UTF-8 heap for each string column, each aligned to 8 bytes
+
+Numeric columns are read straight out of the mapping and strings are
+decoded only when a record is accessed, so opening a catalog costs a few
+page faults regardless of size, and every worker that maps the same file
+shares its pages through the OS page cache.
+"""
+import argparse
+import mmap
+import os
+import struct
+from collections.abc import Sequence
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from data.catalog_store import NUMERIC_COLUMNS, STRING_COLUMNS, CatalogStore
+
+MAGIC = b'CCAT'
+VERSION = 1
+HEADER = struct.Struct('<4sIQI')
+TABLE_ENTRY = struct.Struct('<QQ')
+ALIGNMENT = 8
+
+NUMERIC_DTYPES = {name: np.dtype(dtype).newbyteorder('<') for name, dtype in NUMERIC_COLUMNS.items()}
+CATEGORY_DTYPE = np.dtype('<i4')
+OFFSET_DTYPE = np.dtype('<u8')
+HEAP_COLUMNS = STRING_COLUMNS + ('categories',)
+SECTIONS = (
+    list(NUMERIC_COLUMNS)
+    + ['category_codes']
+    + [f'{name}.{part}' for name in HEAP_COLUMNS for part in ('offsets', 'heap')]
+)
+
+
+class StringHeap(Sequence):
+    """Lazily decoded strings from an offset-indexed UTF-8 heap"""
+
+    def __init__(self, offsets: np.ndarray, heap: memoryview):
+        self._offsets = offsets
+        self._heap = heap
+        self._base_size = len(offsets) - 1
+        # Strings appended after loading live in memory; the mapping is read-only
+        self._extra: List[str] = []
+
+    def __len__(self):
+        return self._base_size + len(self._extra)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if position >= self._base_size:
+            return self._extra[position - self._base_size]
+        start, end = int(self._offsets[position]), int(self._offsets[position + 1])
+        return str(self._heap[start:end], 'utf-8')
+
+    def extend(self, values: Iterable[str]):
+        """Append strings after the mapped ones"""
+        self._extra.extend(values)
+
+
+def _encode_strings(values: Iterable[str]):
+    """Encode strings into an offsets array and a single heap"""
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=OFFSET_DTYPE)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return offsets.tobytes(), b''.join(encoded)
+
+
+def write_catalog(path: str, products: Iterable[Dict]):
+    """Write products to a binary catalog file, replacing it atomically"""
+    store = CatalogStore(products)
+
+    sections: Dict[str, bytes] = {}
+    for name, dtype in NUMERIC_DTYPES.items():
+        sections[name] = store.column(name).astype(dtype).tobytes()
+    sections['category_codes'] = store.category_codes.astype(CATEGORY_DTYPE).tobytes()
+    for name in STRING_COLUMNS:
+        sections[f'{name}.offsets'], sections[f'{name}.heap'] = _encode_strings(store.string_column(name))
+    sections['categories.offsets'], sections['categories.heap'] = _encode_strings(store.categories)
+
+    offset = HEADER.size + TABLE_ENTRY.size * len(SECTIONS)
+    table = []
+    for name in SECTIONS:
+        offset += -offset % ALIGNMENT
+        table.append((offset, len(sections[name])))
+        offset += len(sections[name])
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(store), len(SECTIONS)))
+        for entry in table:
+            f.write(TABLE_ENTRY.pack(*entry))
+        for name, (section_offset, _) in zip(SECTIONS, table):
+            f.write(b'\0' * (section_offset - f.tell()))
+            f.write(sections[name])
+    os.replace(tmp_path, path)
+
+
+def open_catalog(path: str) -> CatalogStore:
+    """Memory-map a binary catalog file as a CatalogStore"""
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, count, section_count = HEADER.unpack_from(mapped, 0)
+    if magic != MAGIC:
+        raise ValueError(f"Not a catalog file: {path}")
+    if version != VERSION or section_count != len(SECTIONS):
+        raise ValueError(f"Unsupported catalog file version {version}: {path}")
+
+    table = {
+        name: TABLE_ENTRY.unpack_from(mapped, HEADER.size + i * TABLE_ENTRY.size)
+        for i, name in enumerate(SECTIONS)
+    }
+    view = memoryview(mapped)
+
+    def array(name, dtype, length=count):
+        return np.frombuffer(mapped, dtype=dtype, count=length, offset=table[name][0])
+
+    def heap(name, length=count):
+        offsets = array(f'{name}.offsets', OFFSET_DTYPE, length + 1)
+        start, size = table[f'{name}.heap']
+        return StringHeap(offsets, view[start:start + size])
+
+    category_count = table['categories.offsets'][1] // OFFSET_DTYPE.itemsize - 1
+    return CatalogStore.from_columns(
+        numeric={name: array(name, dtype) for name, dtype in NUMERIC_DTYPES.items()},
+        category_codes=array('category_codes', CATEGORY_DTYPE),
+        strings={name: heap(name) for name in STRING_COLUMNS},
+        categories=list(heap('categories', category_count)),
+    )
+
+
+def main():
+    """Convert a CSV/JSON product export into a binary catalog file"""
+    from services.data_service import DataService
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('source', help="CSV or JSON product file")
+    parser.add_argument('output', help="Catalog file to write")
+    args = parser.parse_args()
+
+    data_service = DataService()
+    with open(args.source, encoding='utf-8') as f:
+        content = f.read()
+    if args.source.endswith('.csv'):
+        records = data_service.import_csv_data(content)
+    else:
+        records = data_service.import_json_data(content)
+    products = data_service.transform_to_products(records, {})
+
+    write_catalog(args.output, products)
+    print(f"Wrote {len(products)} products to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
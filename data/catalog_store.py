@@ -0,0 +1,214 @@
+"""Columnar product storage backed by NumPy arrays"""
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+NUMERIC_COLUMNS = {
+    'price': np.float64,
+    'rating': np.float64,
+    'reviews': np.int64,
+}
+STRING_COLUMNS = ('id', 'name', 'description', 'image')
+PRODUCT_FIELDS = ('id', 'name', 'price', 'category', 'description', 'image', 'rating', 'reviews')
+
+# Sort mode -> (column, descending); 'Featured' keeps catalog order
+SORT_MODES = {
+    'Price: Low to High': ('price', False),
+    'Price: High to Low': ('price', True),
+    'Rating': ('rating', True),
+    'Name': ('name', False),
+}
+
+
+def _as_number(value: float):
+    """Return whole-number floats as ints so prices display without decimals"""
+    return int(value) if float(value).is_integer() else float(value)
+
+
+class CatalogStore:
+    """Columnar catalog with category codes and cached sort orders"""
+
+    def __init__(self, products: Iterable[Dict] = ()):
+        self._size = 0
+        self._capacity = 0
+        self._numeric: Dict[str, np.ndarray] = {
+            name: np.zeros(0, dtype=dtype) for name, dtype in NUMERIC_COLUMNS.items()
+        }
+        self._category_codes = np.zeros(0, dtype=np.int32)
+        self._strings: Dict[str, Sequence[str]] = {name: [] for name in STRING_COLUMNS}
+        self.categories: List[str] = []
+        self._category_lookup: Dict[str, int] = {}
+        self._sort_orders: Dict = {}
+        self.append(products)
+
+    @classmethod
+    def from_columns(cls, numeric: Dict[str, np.ndarray], category_codes: np.ndarray,
+                     strings: Dict[str, Sequence[str]], categories: List[str]) -> 'CatalogStore':
+        """Wrap existing column buffers, such as memory-mapped ones, without copying"""
+        store = cls()
+        store._numeric = dict(numeric)
+        store._category_codes = category_codes
+        store._strings = dict(strings)
+        store.categories = list(categories)
+        store._category_lookup = {category: code for code, category in enumerate(store.categories)}
+        store._size = store._capacity = len(category_codes)
+        return store
+
+    def __len__(self):
+        return self._size
+
+    def string_column(self, name: str) -> Sequence[str]:
+        """Get a string column"""
+        return self._strings[name]
+
+    def column(self, name: str) -> np.ndarray:
+        """Get a numeric column trimmed to the catalog size"""
+        return self._numeric[name][:self._size]
+
+    @property
+    def category_codes(self) -> np.ndarray:
+        return self._category_codes[:self._size]
+
+    def append(self, products: Iterable[Dict]):
+        """Append products to the end of every column"""
+        products = list(products)
+        if not products:
+            return
+
+        self._reserve(len(products))
+        start, end = self._size, self._size + len(products)
+        for name in NUMERIC_COLUMNS:
+            self._numeric[name][start:end] = [p[name] for p in products]
+        # str() so a blank CSV category (NaN) can't break sorting the category names
+        self._category_codes[start:end] = [self._category_code(str(p['category'])) for p in products]
+        for name in STRING_COLUMNS:
+            self._strings[name].extend(str(p[name]) for p in products)
+
+        self._size = end
+        self._sort_orders.clear()
+
+    def value(self, position: int, name: str):
+        """Read one field of the product stored at a position"""
+        if name == 'category':
+            return self.categories[self._category_codes[position]]
+        if name == 'price':
+            return _as_number(self._numeric['price'][position])
+        if name == 'rating':
+            return float(self._numeric['rating'][position])
+        if name == 'reviews':
+            return int(self._numeric['reviews'][position])
+        return self._strings[name][position]
+
+    def record(self, position: int) -> Dict:
+        """Build the product dict stored at a position"""
+        return {name: self.value(position, name) for name in PRODUCT_FIELDS}
+
+    def category_mask(self, category: str) -> np.ndarray:
+        """Boolean mask of products in a category"""
+        code = self._category_lookup.get(category)
+        if code is None:
+            return np.zeros(self._size, dtype=bool)
+        return self.category_codes == code
+
+    def sort_order(self, sort_by: str) -> np.ndarray:
+        """Cached permutation of all positions for a sort mode"""
+        order = self._sort_orders.get(sort_by)
+        if order is None:
+            order = self._sort_orders[sort_by] = self._compute_order(sort_by)
+        return order
+
+    def has_sort_order(self, sort_by: str) -> bool:
+        """Whether the permutation for a sort mode is already cached"""
+        return sort_by in self._sort_orders
+
+    def top_k(self, sort_by: str, k: int, candidates: np.ndarray) -> np.ndarray:
+        """First k candidates in sort order, without sorting the whole catalog
+
+        candidates must be in ascending position order; ties keep that order,
+        matching the stable full sort.
+        """
+        if sort_by not in SORT_MODES:
+            return candidates[:k]
+
+        name, descending = SORT_MODES[sort_by]
+        if name not in NUMERIC_COLUMNS:
+            order = self.sort_order(sort_by)
+            mask = np.zeros(self._size, dtype=bool)
+            mask[candidates] = True
+            return order[mask[order]][:k]
+
+        keys = self.column(name)[candidates]
+        if descending:
+            keys = -keys
+        if k >= len(candidates):
+            return candidates[np.argsort(keys, kind='stable')]
+        if k <= 0:
+            return candidates[:0]
+
+        # Everything strictly below the k-th key is in; fill the rest with the earliest ties
+        kth = np.partition(keys, k - 1)[k - 1]
+        below = keys < kth
+        head = candidates[below][np.argsort(keys[below], kind='stable')]
+        ties = candidates[keys == kth][:k - len(head)]
+        return np.concatenate([head, ties])
+
+    def sort_rank(self, sort_by: str) -> np.ndarray:
+        """Cached rank of every position under a sort mode"""
+        key = ('rank', sort_by)
+        rank = self._sort_orders.get(key)
+        if rank is None:
+            order = self.sort_order(sort_by)
+            rank = np.empty(self._size, dtype=np.int64)
+            rank[order] = np.arange(self._size)
+            self._sort_orders[key] = rank
+        return rank
+
+    def sort_keys(self, sort_by: str, positions: np.ndarray) -> np.ndarray:
+        """Keys of the given positions that sort ascending in sort_by order
+
+        Lets results from two stores that are each in sort order be merged.
+        """
+        name, descending = SORT_MODES[sort_by]
+        if name in NUMERIC_COLUMNS:
+            keys = self.column(name)[positions]
+            return -keys if descending else keys
+        strings = self._strings[name]
+        return np.array([strings[position] for position in positions.tolist()], dtype=str)
+
+    def _compute_order(self, sort_by: str) -> np.ndarray:
+        if sort_by not in SORT_MODES:
+            return np.arange(self._size)
+
+        name, descending = SORT_MODES[sort_by]
+        if name in NUMERIC_COLUMNS:
+            keys = self.column(name)
+            # Stable sort on the negated key keeps catalog order for ties, like sorted(reverse=True)
+            return np.argsort(-keys if descending else keys, kind='stable')
+        return np.argsort(np.array(list(self._strings[name])), kind='stable')
+
+    def _category_code(self, category: str) -> int:
+        code = self._category_lookup.get(category)
+        if code is None:
+            code = self._category_lookup[category] = len(self.categories)
+            self.categories.append(category)
+        return code
+
+    def _reserve(self, extra: int):
+        """Grow the numeric buffers geometrically so appends stay amortized O(1)
+
+        Buffers wrapped by from_columns are copied on the first append, which
+        also moves read-only mapped columns into writable memory.
+        """
+        needed = self._size + extra
+        if needed <= self._capacity:
+            return
+
+        capacity = max(needed, self._capacity * 2, 16)
+        for name, values in self._numeric.items():
+            grown = np.zeros(capacity, dtype=values.dtype)
+            grown[:self._size] = values[:self._size]
+            self._numeric[name] = grown
+        grown = np.zeros(capacity, dtype=np.int32)
+        grown[:self._size] = self._category_codes[:self._size]
+        self._category_codes = grown
+        self._capacity = capacity
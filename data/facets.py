@@ -0,0 +1,95 @@
+"""Facet counts over the catalog using bitmap intersections"""
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config.settings import CURRENCY_SYMBOL, PRICE_FACET_BUCKETS, RATING_FACET_BUCKETS
+from data.catalog_store import CatalogStore
+
+
+def to_bitmap(mask: np.ndarray) -> int:
+    """Pack a boolean mask into an int whose bit i is mask[i]"""
+    return int.from_bytes(np.packbits(mask, bitorder='little').tobytes(), 'little')
+
+
+def bucket_labels(edges: List[float], fmt) -> List[str]:
+    """Human readable labels for the buckets split by edges"""
+    labels = [f"Under {fmt(edges[0])}"]
+    labels += [f"{fmt(low)} - {fmt(high)}" for low, high in zip(edges, edges[1:])]
+    labels.append(f"{fmt(edges[-1])}+")
+    return labels
+
+
+class Facet:
+    """One bitmap and running count per bucket of a facet"""
+
+    def __init__(self, labels: List[str]):
+        self.labels = labels
+        self.bitmaps: List[int] = [0] * len(labels)
+        self.counts: List[int] = [0] * len(labels)
+
+    def add(self, buckets: np.ndarray, start: int):
+        """Set the bits for rows start.. whose bucket numbers are given"""
+        for bucket in np.unique(buckets).tolist():
+            if bucket >= len(self.bitmaps):
+                missing = bucket + 1 - len(self.bitmaps)
+                self.bitmaps += [0] * missing
+                self.counts += [0] * missing
+            in_bucket = buckets == bucket
+            self.bitmaps[bucket] |= to_bitmap(in_bucket) << start
+            self.counts[bucket] += int(in_bucket.sum())
+
+    def count(self, selection: Optional[int] = None) -> Dict[str, int]:
+        """Bucket counts, restricted to a selection bitmap if given"""
+        if selection is None:
+            counts = self.counts
+        else:
+            counts = [(bitmap & selection).bit_count() for bitmap in self.bitmaps]
+        return dict(zip(self.labels, counts))
+
+
+class FacetIndex:
+    """Category, price and rating facets kept in step with a catalog store"""
+
+    def __init__(self, store: CatalogStore):
+        self.store = store
+        self.price_edges = np.array(PRICE_FACET_BUCKETS, dtype=np.float64)
+        self.rating_edges = np.array(RATING_FACET_BUCKETS, dtype=np.float64)
+        self.category = Facet([])
+        self.price = Facet(bucket_labels(PRICE_FACET_BUCKETS, lambda v: f"{CURRENCY_SYMBOL}{v:,.0f}"))
+        self.rating = Facet(bucket_labels(RATING_FACET_BUCKETS, lambda v: f"{v:.1f}"))
+        self._size = 0
+        self.sync()
+
+    def sync(self):
+        """Index rows appended to the store since the last sync"""
+        start, end = self._size, len(self.store)
+        if start == end:
+            return
+
+        self.category.add(self.store.category_codes[start:end], start)
+        self.category.labels = list(self.store.categories)
+        self.price.add(np.searchsorted(self.price_edges, self.store.column('price')[start:end], side='right'), start)
+        self.rating.add(np.searchsorted(self.rating_edges, self.store.column('rating')[start:end], side='right'), start)
+        self._size = end
+
+    def counts(self, search_mask: Optional[np.ndarray] = None,
+               category_mask: Optional[np.ndarray] = None) -> Dict[str, Dict[str, int]]:
+        """Facet counts under the current filters
+
+        Category counts ignore the category filter itself so shoppers can
+        see what switching category would give; price and rating counts
+        apply both filters.
+        """
+        self.sync()
+        search_bits = None if search_mask is None else to_bitmap(search_mask)
+        selected_bits = search_bits
+        if category_mask is not None:
+            category_bits = to_bitmap(category_mask)
+            selected_bits = category_bits if search_bits is None else search_bits & category_bits
+
+        return {
+            'category': self.category.count(search_bits),
+            'price': self.price.count(selected_bits),
+            'rating': self.rating.count(selected_bits),
+        }
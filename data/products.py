@@ -1,4 +1,15 @@
 """Product data and management"""
+import threading
+from collections.abc import Mapping, Sequence
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import AUTOCOMPLETE_SUGGESTIONS, AUTOCOMPLETE_TOP_K, PRODUCTS_PER_PAGE
+from data.catalog_file import open_catalog
+from data.catalog_store import PRODUCT_FIELDS, SORT_MODES, CatalogStore
+from data.facets import FacetIndex
+from data.search_index import AutocompleteIndex, FuzzyIndex, SearchIndex
 
 SAMPLE_PRODUCTS = [
     {
@@ -123,11 +134,119 @@ SAMPLE_PRODUCTS = [
     }
 ]
 
+class Product(Mapping):
+    """Slotted product record read from the catalog by position
+    
+    Holds only a store reference and a position; fields are read from the
+    catalog columns on access, so records and the cart lines that keep
+    them never copy catalog strings. Supports dict-style access.
+    """
+    
+    __slots__ = ('store', 'position')
+    
+    def __init__(self, store: CatalogStore, position: int):
+        self.store = store
+        self.position = position
+    
+    def __getitem__(self, key: str):
+        if key not in PRODUCT_FIELDS:
+            raise KeyError(key)
+        return self.store.value(self.position, key)
+    
+    def __iter__(self):
+        return iter(PRODUCT_FIELDS)
+    
+    def __len__(self):
+        return len(PRODUCT_FIELDS)
+    
+    def __repr__(self):
+        return f"Product({self.to_dict()!r})"
+    
+    def to_dict(self) -> Dict:
+        """Copy the record into a plain dict"""
+        return self.store.record(self.position)
+
+class ProductView(Sequence):
+    """Read-only sequence of Product records over a catalog store"""
+    
+    def __init__(self, store: CatalogStore):
+        self.store = store
+    
+    def __len__(self):
+        return len(self.store)
+    
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [Product(self.store, i) for i in range(*position.indices(len(self.store)))]
+        if position < 0:
+            position += len(self.store)
+        if not 0 <= position < len(self.store):
+            raise IndexError('product index out of range')
+        return Product(self.store, int(position))
+
 class ProductManager:
     """Manage product data and operations"""
     
-    def __init__(self):
-        self.products = SAMPLE_PRODUCTS.copy()
+    def __init__(self, products: Optional[List[Dict]] = None, store: Optional[CatalogStore] = None):
+        # One catalog may be shared by every session, so writes must not race index reads
+        self._lock = threading.RLock()
+        self._search_index: Optional[SearchIndex] = None
+        self._fuzzy_index: Optional[FuzzyIndex] = None
+        self._autocomplete_index: Optional[AutocompleteIndex] = None
+        self._facets: Optional[FacetIndex] = None
+        self._positions: Optional[Dict[str, int]] = None
+        
+        if store is None:
+            products = list(SAMPLE_PRODUCTS if products is None else products)
+            store = CatalogStore(products)
+            self._search_index = SearchIndex(products)
+            self._positions = {}
+            self._index_ids(products, 0)
+        
+        # File-backed stores build their indexes on first use to keep startup instant
+        self.store = store
+        self.products = ProductView(self.store)
+    
+    @classmethod
+    def from_file(cls, path: str) -> 'ProductManager':
+        """Load a memory-mapped binary catalog file"""
+        return cls(store=open_catalog(path))
+    
+    @property
+    def search_index(self) -> SearchIndex:
+        """Inverted index over the catalog, built on first use"""
+        if self._search_index is None:
+            with self._lock:
+                if self._search_index is None:
+                    self._search_index = SearchIndex(self.products)
+        return self._search_index
+    
+    @property
+    def fuzzy_index(self) -> FuzzyIndex:
+        """Trigram index over product names, built on first fuzzy search"""
+        if self._fuzzy_index is None:
+            with self._lock:
+                if self._fuzzy_index is None:
+                    self._fuzzy_index = FuzzyIndex(self.products)
+        return self._fuzzy_index
+    
+    @property
+    def autocomplete_index(self) -> AutocompleteIndex:
+        """Prefix table of top products per name prefix, built on first use"""
+        if self._autocomplete_index is None:
+            with self._lock:
+                if self._autocomplete_index is None:
+                    self._autocomplete_index = AutocompleteIndex(self.products, AUTOCOMPLETE_TOP_K)
+        return self._autocomplete_index
+    
+    @property
+    def facets(self) -> FacetIndex:
+        """Facet bitmaps and counts, built on first use and synced on append"""
+        if self._facets is None:
+            with self._lock:
+                if self._facets is None:
+                    self._facets = FacetIndex(self.store)
+        return self._facets
     
     def get_all_products(self):
         """Get all products"""
@@ -135,42 +254,323 @@ class ProductManager:
     
     def get_product_by_id(self, product_id: str):
         """Get product by ID"""
-        return next((p for p in self.products if p['id'] == product_id), None)
+        position = self._id_positions().get(product_id)
+        return None if position is None else Product(self.store, position)
+    
+    def get_products(self, positions) -> List[Product]:
+        """Get products at catalog positions, in the given order"""
+        return [Product(self.store, int(i)) for i in positions]
+    
+    def query(self, search_query: str = '', category: str = 'All', sort_by: str = 'Featured',
+              fuzzy: bool = False) -> np.ndarray:
+        """Catalog positions matching a search and category, in sort order
+        
+        With fuzzy=True the search tolerates typos, and the Featured order
+        ranks the closest matches first.
+        """
+        # Masks, search hits and sort orders must all come from one catalog length
+        with self._lock:
+            if fuzzy and search_query and sort_by not in SORT_MODES:
+                ranked = np.array(self._search_positions(search_query, fuzzy), dtype=np.int64)
+                if category != 'All':
+                    ranked = ranked[self.store.category_mask(category)[ranked]]
+                return ranked
+            
+            mask = self._filter_mask(search_query, category, fuzzy)
+            order = self.store.sort_order(sort_by)
+            if mask is None:
+                return order
+            return order[mask[order]]
+    
+    def query_page(self, search_query: str = '', category: str = 'All', sort_by: str = 'Featured',
+                   page: int = 0, per_page: int = PRODUCTS_PER_PAGE,
+                   fuzzy: bool = False) -> Tuple[np.ndarray, int]:
+        """Positions on one page of a query, plus the total number of matches"""
+        with self._lock:
+            if page == 0 and not fuzzy and not self.store.has_sort_order(sort_by):
+                # First page on a cold sort order: partial sort instead of a full argsort
+                mask = self._filter_mask(search_query, category)
+                candidates = np.arange(len(self.store)) if mask is None else np.flatnonzero(mask)
+                return self.store.top_k(sort_by, per_page, candidates), len(candidates)
+        
+        positions = self.query(search_query, category, sort_by, fuzzy)
+        start = page * per_page
+        return positions[start:start + per_page], len(positions)
+    
+    def _filter_mask(self, search_query: str, category: str, fuzzy: bool = False) -> Optional[np.ndarray]:
+        """Boolean mask for the search and category filters, or None if unfiltered
+        
+        Callers hold _lock so the mask matches the catalog they index with it.
+        """
+        mask = None
+        if category != 'All':
+            mask = self.store.category_mask(category)
+        if search_query:
+            search_mask = np.zeros(len(self.store), dtype=bool)
+            search_mask[self._search_positions(search_query, fuzzy)] = True
+            mask = search_mask if mask is None else mask & search_mask
+        return mask
     
-    def search_products(self, query: str):
-        """Search products by name or description"""
-        query = query.lower()
-        return [p for p in self.products 
-                if query in p['name'].lower() or query in p['description'].lower()]
+    def _search_positions(self, search_query: str, fuzzy: bool = False) -> List[int]:
+        """Positions matching a search, ranked by edit distance when fuzzy"""
+        with self._lock:
+            if fuzzy:
+                return self.fuzzy_index.search(search_query)
+            return self.search_index.search(search_query)
+    
+    def search_products(self, query: str, fuzzy: bool = False):
+        """Search products by name, description or category
+        
+        fuzzy=True matches product names within a small edit distance of
+        each term, so misspellings like "samsng" still find results.
+        """
+        return self.get_products(self._search_positions(query, fuzzy))
+    
+    def autocomplete(self, prefix: str, limit: int = AUTOCOMPLETE_SUGGESTIONS) -> List[str]:
+        """Top product name completions for a partially typed query
+        
+        Ranked by reviews, then rating. Only the precomputed top
+        AUTOCOMPLETE_TOP_K products per prefix are considered.
+        """
+        with self._lock:
+            positions = self.autocomplete_index.complete(prefix, limit)
+        names = self.store.string_column('name')
+        return [names[position] for position in positions]
     
     def filter_by_category(self, category: str):
         """Filter products by category"""
         if category == 'All':
             return self.products
-        return [p for p in self.products if p['category'] == category]
+        with self._lock:
+            positions = np.flatnonzero(self.store.category_mask(category))
+        return self.get_products(positions)
+    
+    def facet_counts(self, search_query: str = '', category: str = 'All', fuzzy: bool = False) -> Dict[str, Dict[str, int]]:
+        """Category, price and rating counts under the current search and category"""
+        with self._lock:
+            search_mask = self._filter_mask(search_query, 'All', fuzzy)
+            category_mask = None if category == 'All' else self.store.category_mask(category)
+            return self.facets.counts(search_mask, category_mask)
     
     def get_categories(self):
         """Get all unique categories"""
-        categories = set(p['category'] for p in self.products)
-        return ['All'] + sorted(list(categories))
+        return ['All'] + sorted(self.store.categories)
     
     def sort_products(self, products, sort_by: str):
         """Sort products by specified criteria"""
-        if sort_by == "Price: Low to High":
-            return sorted(products, key=lambda x: x['price'])
-        elif sort_by == "Price: High to Low":
-            return sorted(products, key=lambda x: x['price'], reverse=True)
-        elif sort_by == "Rating":
-            return sorted(products, key=lambda x: x['rating'], reverse=True)
-        elif sort_by == "Name":
-            return sorted(products, key=lambda x: x['name'])
-        else:  # Featured
+        if sort_by not in SORT_MODES:  # Featured
             return products
+        
+        id_positions = self._id_positions()
+        positions = [id_positions.get(p['id']) for p in products]
+        if None in positions:
+            # Products from outside the catalog have no precomputed rank
+            column, descending = SORT_MODES[sort_by]
+            return sorted(products, key=lambda x: x[column], reverse=descending)
+        
+        with self._lock:
+            rank = self.store.sort_rank(sort_by)
+        ordered = np.argsort(rank[np.array(positions, dtype=np.int64)], kind='stable')
+        return [products[i] for i in ordered]
     
     def add_product(self, product: dict):
         """Add a new product"""
-        self.products.append(product)
+        self.add_products([product])
     
     def add_products(self, products: list):
         """Add multiple products"""
-        self.products.extend(products)
\ No newline at end of file
+        with self._lock:
+            start = len(self.store)
+            self.store.append(products)
+            # Only after a successful append, so ids never point past the catalog
+            if self._positions is not None:
+                self._index_ids(products, start)
+            # Indexes that have not been built yet will pick these up when they are
+            if self._fuzzy_index is not None:
+                self._fuzzy_index.add_many(products)
+            if self._autocomplete_index is not None:
+                self._autocomplete_index.add_many(products)
+            if self._facets is not None:
+                self._facets.sync()
+            if self._search_index is None:
+                return
+            if len(products) == 1:
+                self._search_index.add(products[0])
+            else:
+                self._search_index.add_many(products)
+    
+    def _id_positions(self) -> Dict[str, int]:
+        """Product id -> catalog position map, built on first use"""
+        if self._positions is None:
+            with self._lock:
+                if self._positions is None:
+                    positions = {}
+                    for position, product_id in enumerate(self.store.string_column('id')):
+                        positions.setdefault(product_id, position)
+                    self._positions = positions
+        return self._positions
+    
+    def _index_ids(self, products: List[Dict], start: int):
+        """Map product ids to catalog positions, keeping the first occurrence"""
+        for offset, product in enumerate(products):
+            self._positions.setdefault(product['id'], start + offset)
+
+class OverlayView(Sequence):
+    """Read-only sequence of the shared catalog's records followed by a session's own"""
+    
+    def __init__(self, shared: Sequence, local: Sequence):
+        self.shared = shared
+        self.local = local
+    
+    def __len__(self):
+        return len(self.shared) + len(self.local)
+    
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        shared_size = len(self.shared)
+        if position < shared_size:
+            return self.shared[position]
+        return self.local[position - shared_size]
+
+class SessionCatalog:
+    """Per-session view of a shared ProductManager with copy-on-write additions
+    
+    Reads go straight to the shared catalog until the session adds products
+    of its own. Those go into a small private ProductManager holding only
+    the session's products, and reads merge its results with the shared
+    catalog's, so a session's memory grows with what it added, never with
+    the catalog.
+    
+    Positions returned by query() and query_page() are shared catalog
+    positions, with the session's products encoded as -1 - local position;
+    pass them to this view's get_products().
+    """
+    
+    def __init__(self, shared: ProductManager):
+        self.shared = shared
+        self._local: Optional[ProductManager] = None
+    
+    @property
+    def is_local(self) -> bool:
+        """Whether this session has products of its own"""
+        return self._local is not None
+    
+    @property
+    def products(self) -> Sequence:
+        if self._local is None:
+            return self.shared.products
+        return OverlayView(self.shared.products, self._local.products)
+    
+    def get_all_products(self):
+        """Get all products"""
+        return self.products
+    
+    def add_local_products(self, products: List[Dict]):
+        """Add products visible to this session only"""
+        if self._local is None:
+            self._local = ProductManager([])
+        self._local.add_products(products)
+    
+    def get_product_by_id(self, product_id: str):
+        """Get product by ID, preferring the shared catalog like ProductManager does for duplicates"""
+        product = self.shared.get_product_by_id(product_id)
+        if product is None and self._local is not None:
+            product = self._local.get_product_by_id(product_id)
+        return product
+    
+    def get_products(self, positions) -> List[Product]:
+        """Get products at positions from query(), in the given order"""
+        if self._local is None:
+            return self.shared.get_products(positions)
+        return [
+            Product(self.shared.store, position) if position >= 0 else Product(self._local.store, -1 - position)
+            for position in map(int, positions)
+        ]
+    
+    def query(self, search_query: str = '', category: str = 'All', sort_by: str = 'Featured',
+              fuzzy: bool = False) -> np.ndarray:
+        """ProductManager.query() over the shared catalog and this session's products
+        
+        Featured order lists shared products first; sort modes merge both in
+        order, shared first on ties.
+        """
+        shared = self.shared.query(search_query, category, sort_by, fuzzy)
+        if self._local is None:
+            return shared
+        local = self._local.query(search_query, category, sort_by, fuzzy)
+        encoded = -1 - local
+        if sort_by not in SORT_MODES or not len(local):
+            return np.concatenate([shared, encoded])
+        with self.shared._lock:
+            shared_keys = self.shared.store.sort_keys(sort_by, shared)
+        slots = np.searchsorted(shared_keys, self._local.store.sort_keys(sort_by, local), side='right')
+        return np.insert(shared, slots, encoded)
+    
+    def query_page(self, search_query: str = '', category: str = 'All', sort_by: str = 'Featured',
+                   page: int = 0, per_page: int = PRODUCTS_PER_PAGE,
+                   fuzzy: bool = False) -> Tuple[np.ndarray, int]:
+        """Positions on one page of a query, plus the total number of matches"""
+        if self._local is None:
+            return self.shared.query_page(search_query, category, sort_by, page, per_page, fuzzy)
+        positions = self.query(search_query, category, sort_by, fuzzy)
+        start = page * per_page
+        return positions[start:start + per_page], len(positions)
+    
+    def search_products(self, query: str, fuzzy: bool = False):
+        """Search the shared catalog and this session's products"""
+        products = self.shared.search_products(query, fuzzy)
+        if self._local is not None:
+            products += self._local.search_products(query, fuzzy)
+        return products
+    
+    def autocomplete(self, prefix: str, limit: int = AUTOCOMPLETE_SUGGESTIONS) -> List[str]:
+        """Top completions across the shared catalog and this session's products"""
+        if self._local is None:
+            return self.shared.autocomplete(prefix, limit)
+        ranked = []
+        for manager in (self.shared, self._local):
+            with manager._lock:
+                positions = manager.autocomplete_index.complete(prefix, limit)
+            ranked += [
+                (manager.store.value(position, 'reviews'), manager.store.value(position, 'rating'),
+                 manager.store.value(position, 'name'))
+                for position in positions
+            ]
+        # Same ranking as AutocompleteIndex: reviews, then rating
+        ranked.sort(key=lambda entry: (-entry[0], -entry[1]))
+        return [name for _, _, name in ranked[:limit]]
+    
+    def filter_by_category(self, category: str):
+        """Filter products by category"""
+        if self._local is None:
+            return self.shared.filter_by_category(category)
+        if category == 'All':
+            return self.products
+        return list(self.shared.filter_by_category(category)) + list(self._local.filter_by_category(category))
+    
+    def facet_counts(self, search_query: str = '', category: str = 'All', fuzzy: bool = False) -> Dict[str, Dict[str, int]]:
+        """Facet counts summed over the shared catalog and this session's products"""
+        counts = self.shared.facet_counts(search_query, category, fuzzy)
+        if self._local is None:
+            return counts
+        for facet, local_counts in self._local.facet_counts(search_query, category, fuzzy).items():
+            merged = counts[facet] = dict(counts[facet])
+            for label, count in local_counts.items():
+                merged[label] = merged.get(label, 0) + count
+        return counts
+    
+    def get_categories(self):
+        """Get all unique categories"""
+        categories = self.shared.get_categories()
+        if self._local is None:
+            return categories
+        return ['All'] + sorted(set(categories[1:]) | set(self._local.store.categories))
+    
+    def __getattr__(self, name):
+        # Only called for attributes not defined here: delegate to the shared catalog
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.shared, name)
@@ -0,0 +1,278 @@
+"""Inverted token index for product search"""
+import re
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Set
+
+from config.settings import SEARCH_PREFIX_CACHE_SIZE
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+INDEXED_FIELDS = ('name', 'description', 'category')
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric tokens"""
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+class SearchIndex:
+    """Token/prefix inverted index over product positions"""
+
+    def __init__(self, products: Iterable[Dict] = (), prefix_cache_size: int = SEARCH_PREFIX_CACHE_SIZE):
+        self._postings: Dict[str, Set[int]] = {}
+        self._vocab: List[str] = []
+        # LRU of prefix unions; keys come from shopper input, so it must stay bounded
+        self._prefix_cache: OrderedDict = OrderedDict()
+        self.prefix_cache_size = prefix_cache_size
+        self._size = 0
+        self.add_many(products)
+
+    def __len__(self):
+        return self._size
+
+    def add(self, product: Dict):
+        """Index a single product at the next position"""
+        new_tokens = self._index_product(self._size, product)
+        self._size += 1
+        for token in new_tokens:
+            insort(self._vocab, token)
+        if new_tokens or self._prefix_cache:
+            self._prefix_cache.clear()
+
+    def add_many(self, products: Iterable[Dict]):
+        """Index several products, re-sorting the vocabulary once"""
+        new_tokens = []
+        for product in products:
+            new_tokens.extend(self._index_product(self._size, product))
+            self._size += 1
+        if new_tokens:
+            self._vocab = sorted(self._postings)
+        self._prefix_cache.clear()
+
+    def search(self, query: str) -> List[int]:
+        """Return positions matching every query term as a token prefix"""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        postings = []
+        for term in terms:
+            matches = self._prefix_postings(term)
+            if not matches:
+                return []
+            postings.append(matches)
+
+        # Intersect smallest posting lists first so the working set only shrinks
+        postings.sort(key=len)
+        result = set(postings[0])
+        for matches in postings[1:]:
+            result &= matches
+            if not result:
+                return []
+        return sorted(result)
+
+    def _index_product(self, position: int, product: Dict) -> List[str]:
+        """Add a product's tokens to the postings, returning unseen tokens"""
+        new_tokens = []
+        for field in INDEXED_FIELDS:
+            for token in tokenize(product.get(field, '')):
+                posting = self._postings.get(token)
+                if posting is None:
+                    posting = self._postings[token] = set()
+                    new_tokens.append(token)
+                posting.add(position)
+        return new_tokens
+
+    def _prefix_postings(self, prefix: str) -> Set[int]:
+        """Union the postings of every vocabulary token starting with prefix"""
+        cached = self._prefix_cache.get(prefix)
+        if cached is not None:
+            self._prefix_cache.move_to_end(prefix)
+            return cached
+
+        # Tokens are [a-z0-9], so every token with this prefix sorts below prefix + DEL
+        start = bisect_left(self._vocab, prefix)
+        end = bisect_left(self._vocab, prefix + '\x7f', start)
+
+        if end - start == 0:
+            return set()
+        if end - start == 1:
+            # A single token's postings are already a direct lookup; don't cache them
+            return self._postings[self._vocab[start]]
+
+        matches = set()
+        for token in self._vocab[start:end]:
+            matches |= self._postings[token]
+        self._prefix_cache[prefix] = matches
+        if len(self._prefix_cache) > self.prefix_cache_size:
+            self._prefix_cache.popitem(last=False)
+        return matches
+
+
+def trigrams(token: str) -> Set[str]:
+    """Character trigrams of a token, padded so word boundaries count"""
+    padded = f'${token}$'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_edits(term: str) -> int:
+    """Edit budget for a query term; short terms must match exactly"""
+    if len(term) <= 4:
+        return 0
+    return 1 if len(term) <= 8 else 2
+
+
+def bounded_edit_distance(a: str, b: str, budget: int) -> int:
+    """Levenshtein distance, or budget + 1 as soon as it must exceed budget"""
+    if abs(len(a) - len(b)) > budget:
+        return budget + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [budget + 1] * len(b)
+        # Only cells within the budget band of the diagonal can stay under budget
+        for j in range(max(1, i - budget), min(len(b), i + budget) + 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != b[j - 1]),
+            )
+        if min(current) > budget:
+            return budget + 1
+        previous = current
+    return min(previous[-1], budget + 1)
+
+
+class FuzzyIndex:
+    """Character trigram index over product name tokens for typo-tolerant search"""
+
+    def __init__(self, products: Iterable[Dict] = ()):
+        self._token_ids: Dict[str, int] = {}
+        self._tokens: List[str] = []
+        self._postings: List[Set[int]] = []
+        self._trigrams: Dict[str, Set[int]] = {}
+        self._size = 0
+        self.add_many(products)
+
+    def __len__(self):
+        return self._size
+
+    def add(self, product: Dict):
+        """Index a single product's name at the next position"""
+        for token in tokenize(product.get('name', '')):
+            token_id = self._token_ids.get(token)
+            if token_id is None:
+                token_id = self._token_ids[token] = len(self._tokens)
+                self._tokens.append(token)
+                self._postings.append(set())
+                for gram in trigrams(token):
+                    self._trigrams.setdefault(gram, set()).add(token_id)
+            self._postings[token_id].add(self._size)
+        self._size += 1
+
+    def add_many(self, products: Iterable[Dict]):
+        """Index several products"""
+        for product in products:
+            self.add(product)
+
+    def search(self, query: str) -> List[int]:
+        """Positions whose names match every term within its edit budget, closest first"""
+        distances: Dict[int, int] = {}
+        for term_number, term in enumerate(set(tokenize(query))):
+            term_distances: Dict[int, int] = {}
+            for token_id, distance in self._match_term(term).items():
+                for position in self._postings[token_id]:
+                    if term_number and position not in distances:
+                        continue
+                    best = term_distances.get(position)
+                    if best is None or distance < best:
+                        term_distances[position] = distance
+            if not term_distances:
+                return []
+            distances = {
+                position: distance + (distances.get(position, 0) if term_number else 0)
+                for position, distance in term_distances.items()
+            }
+        return sorted(distances, key=lambda position: (distances[position], position))
+
+    def _match_term(self, term: str) -> Dict[int, int]:
+        """Vocabulary tokens within the term's edit budget, with their distances"""
+        budget = max_edits(term)
+        exact = self._token_ids.get(term)
+        if budget == 0:
+            return {} if exact is None else {exact: 0}
+
+        # Each edit destroys at most three trigrams, so closer tokens must share the rest
+        grams = trigrams(term)
+        min_shared = max(1, len(grams) - 3 * budget)
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for token_id in self._trigrams.get(gram, ()):
+                shared[token_id] = shared.get(token_id, 0) + 1
+
+        matches = {}
+        for token_id, count in shared.items():
+            if count < min_shared:
+                continue
+            distance = bounded_edit_distance(term, self._tokens[token_id], budget)
+            if distance <= budget:
+                matches[token_id] = distance
+        return matches
+
+
+class AutocompleteIndex:
+    """Prefix table over name tokens holding the top-k products for each prefix
+
+    Every prefix of every name token maps to its best products by
+    (reviews, rating), kept sorted and capped at top_k as products are
+    added, so a lookup is one dict probe no matter how large the catalog.
+    """
+
+    def __init__(self, products: Iterable[Dict] = (), top_k: int = 10):
+        self.top_k = top_k
+        self._top: Dict[str, List[tuple]] = {}
+        self._names: List[str] = []
+        self.add_many(products)
+
+    def __len__(self):
+        return len(self._names)
+
+    def add(self, product: Dict):
+        """Index a single product's name at the next position"""
+        position = len(self._names)
+        name = str(product.get('name', ''))
+        self._names.append(name)
+
+        # Lower sorts first: most reviewed, then best rated, then earliest in the catalog
+        entry = (-int(product.get('reviews', 0)), -float(product.get('rating', 0)), position)
+        prefixes = {token[:end] for token in tokenize(name) for end in range(1, len(token) + 1)}
+        for prefix in prefixes:
+            top = self._top.get(prefix)
+            if top is None:
+                self._top[prefix] = [entry]
+            elif len(top) < self.top_k or entry < top[-1]:
+                insort(top, entry)
+                del top[self.top_k:]
+
+    def add_many(self, products: Iterable[Dict]):
+        """Index several products"""
+        for product in products:
+            self.add(product)
+
+    def complete(self, text: str, limit: int = 5) -> List[int]:
+        """Best positions whose names contain the earlier terms and a token starting with the last"""
+        terms = tokenize(text)
+        if not terms:
+            return []
+
+        *leading, prefix = terms
+        positions = []
+        for _, _, position in self._top.get(prefix, ()):
+            if leading:
+                name_tokens = set(tokenize(self._names[position]))
+                if not all(term in name_tokens for term in leading):
+                    continue
+            positions.append(position)
+            if len(positions) == limit:
+                break
+        return positions
@@ -0,0 +1,135 @@
+"""Score historical session exports in parallel
+
+    python -m models.batch_score sessions.csv scores.csv --workers 8
+
+Input is CSV or NDJSON with one column per model feature (see FEATURES)
+and optionally a session id column. The file is split into line-aligned
+byte ranges; each worker process reads, parses, scores and formats its own
+range, so the parent only stitches finished text together in input order.
+At most two ranges per worker are in flight, so memory stays bounded
+however large the export is, and throughput scales with the worker count.
+"""
+import argparse
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config.settings import MODEL_WEIGHTS_PATH
+from models.cart_prediction import FEATURES, CartPredictionModel, factors_from_mask
+
+# Model loaded once per worker process
+_model: Optional[CartPredictionModel] = None
+
+
+def _init_worker(weights_path: Optional[str]):
+    global _model
+    _model = CartPredictionModel(weights_path)
+
+
+def _is_ndjson(path: str) -> bool:
+    return path.endswith(('.ndjson', '.jsonl', '.json'))
+
+
+def split_ranges(path: str, chunk_bytes: int) -> Tuple[bytes, Iterator[Tuple[int, int]]]:
+    """The CSV header line (empty for NDJSON) and line-aligned byte ranges of the rest"""
+    with open(path, 'rb') as f:
+        header = b'' if _is_ndjson(path) else f.readline()
+    size = os.path.getsize(path)
+
+    def ranges():
+        with open(path, 'rb') as f:
+            start = len(header)
+            while start < size:
+                f.seek(min(start + chunk_bytes, size))
+                f.readline()
+                end = min(f.tell(), size)
+                yield start, end
+                start = end
+
+    return header, ranges()
+
+
+def format_scores(chunk: pd.DataFrame, probabilities: np.ndarray, masks: np.ndarray,
+                  id_column: str) -> pd.DataFrame:
+    """Output rows for a scored chunk; factor labels are built once per distinct mask"""
+    unique_masks, inverse = np.unique(masks, return_inverse=True)
+    labels = np.array(['; '.join(factors_from_mask(int(mask))) for mask in unique_masks], dtype=object)
+    scores = pd.DataFrame({'probability': probabilities, 'factors': labels[inverse]})
+    if id_column in chunk.columns:
+        scores.insert(0, id_column, chunk[id_column].to_numpy())
+    return scores
+
+
+def score_range(path: str, start: int, end: int, header: bytes, id_column: str,
+                ndjson_out: bool, write_header: bool) -> Tuple[int, str]:
+    """Read, score and format one byte range; returns its row count and output text"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = header + f.read(end - start)
+    if header:
+        wanted = set(FEATURES) | {id_column}
+        chunk = pd.read_csv(io.BytesIO(data), usecols=lambda column: column in wanted)
+    else:
+        chunk = pd.read_json(io.BytesIO(data), lines=True)
+
+    missing = [name for name in FEATURES if name not in chunk.columns]
+    if missing:
+        raise ValueError(f"{path} is missing feature columns: {', '.join(missing)}")
+    probabilities, masks = _model.predict_batch(chunk[list(FEATURES)].to_numpy(dtype=np.float64))
+    scores = format_scores(chunk, probabilities, masks, id_column)
+    if ndjson_out:
+        return len(scores), scores.to_json(orient='records', lines=True)
+    return len(scores), scores.to_csv(header=write_header, index=False)
+
+
+def score_file(source: str, output: str, workers: int, chunk_bytes: int,
+               weights_path: Optional[str], id_column: str) -> int:
+    """Score every session in source into output; returns the number of rows"""
+    ndjson_out = _is_ndjson(output)
+    header, ranges = split_ranges(source, chunk_bytes)
+    rows = 0
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(weights_path,)) as pool, \
+            open(output, 'w', encoding='utf-8', newline='') as out:
+        in_flight = deque()
+
+        def write_oldest():
+            nonlocal rows
+            count, text = in_flight.popleft().result()
+            out.write(text)
+            rows += count
+
+        for index, (start, end) in enumerate(ranges):
+            in_flight.append(pool.submit(
+                score_range, source, start, end, header, id_column, ndjson_out, index == 0
+            ))
+            if len(in_flight) >= 2 * workers:
+                write_oldest()
+        while in_flight:
+            write_oldest()
+    return rows
+
+
+def main():
+    """Score a CSV/NDJSON session export with the abandonment model"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('source', help="CSV or NDJSON session export")
+    parser.add_argument('output', help="CSV or NDJSON file to write scores to")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument('--chunk-mb', type=float, default=8, help="Input megabytes per chunk")
+    parser.add_argument('--weights', default=MODEL_WEIGHTS_PATH,
+                        help="Model weight file; the rule scores are used if it does not exist")
+    parser.add_argument('--id-column', default='session_id', help="Column copied through to the output")
+    args = parser.parse_args()
+
+    rows = score_file(args.source, args.output, args.workers, int(args.chunk_mb * 2 ** 20),
+                      args.weights, args.id_column)
+    print(f"Scored {rows} sessions into {args.output}")
+
+
+if __name__ == '__main__':
+    main()
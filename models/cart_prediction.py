@@ -1,63 +1,187 @@
-import random
+import logging
+import os
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from config.settings import ABANDONMENT_THRESHOLD, MODEL_RELOAD_SECONDS, MODEL_WEIGHTS_PATH
+from models.logistic import LogisticModel
+from models.registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+# Active model snapshot: (model, threshold, version); None model means rule scores
+ActiveModel = Tuple[Optional['LogisticModel'], float, Optional[int]]
+
+# Columns of a session feature vector / batch feature matrix
+FEATURES = ('session_duration', 'cart_value', 'line_count', 'behavior_score', 'previous_purchases', 'idle_minutes')
+
+# (factor, feature, test, weight) in the order the rules add to the probability;
+# factor bitmasks set bit i when rule i fires. Tests work on scalars and arrays alike.
+RULES = [
+    ('Long session duration', 'session_duration', lambda x: x > 10, 0.3),
+    ('High cart value', 'cart_value', lambda x: x > 20000, 0.2),
+    ('Many items in cart', 'line_count', lambda x: x > 5, 0.15),
+    ('Low engagement score', 'behavior_score', lambda x: x < 0.5, 0.25),
+    ('First-time visitor', 'previous_purchases', lambda x: x == 0, 0.1),
+    ('Inactive for 1+ minute', 'idle_minutes', lambda x: x > 1, 0.4),
+]
+RULE_COLUMNS = [FEATURES.index(feature) for _, feature, _, _ in RULES]
+LINE_COUNT_COLUMN = FEATURES.index('line_count')
+
+
+def factors_from_mask(mask: int) -> List[str]:
+    """Factor names for the bits set in a factor bitmask"""
+    return [factor for bit, (factor, _, _, _) in enumerate(RULES) if mask >> bit & 1]
+
 
 class CartPredictionModel:
-    """ML-like model for predicting cart abandonment"""
+    """Cart abandonment model
     
-    def __init__(self):
-        self.abandonment_threshold = 0.6
-        self.confidence_base = 0.7
+    Probabilities come from a trained logistic regression when one is
+    available - the registry's current version, else a weight file (see
+    `python -m models.logistic`) - and from the additive rule set
+    otherwise. The rules always supply the factors.
+    
+    The weights, threshold and version live in one tuple that reload()
+    replaces in a single assignment: scoring that already started keeps
+    the old model, and every later call sees the new one. Callers that
+    compare probabilities with the threshold read `active` once and pass
+    it to the scoring methods, so both come from the same version.
+    """
+    
+    def __init__(self, weights_path: Optional[str] = MODEL_WEIGHTS_PATH,
+                 registry: Optional[ModelRegistry] = None):
+        self.registry = registry
+        self._active: ActiveModel = (None, ABANDONMENT_THRESHOLD, None)
+        if registry is not None and registry.current_version() is not None:
+            self.reload()
+        elif weights_path and os.path.exists(weights_path):
+            self._activate(LogisticModel.load(weights_path), None)
+    
+    @property
+    def active(self) -> ActiveModel:
+        """The (model, threshold, version) snapshot in use"""
+        return self._active
+    
+    @property
+    def model(self) -> Optional[LogisticModel]:
+        return self._active[0]
+    
+    @property
+    def abandonment_threshold(self) -> float:
+        return self._active[1]
+    
+    @property
+    def version(self) -> Optional[int]:
+        """Registry version in use, None for a plain weight file or the rules"""
+        return self._active[2]
+    
+    def _activate(self, model: LogisticModel, version: Optional[int]):
+        if model.features != FEATURES:
+            raise ValueError(f"Model version {version} was trained on different features")
+        # Pre-warm: fault in the mapped pages and run both scoring paths once,
+        # so the first real prediction after the swap costs what any other does
+        warmup = np.zeros((2, len(FEATURES)))
+        model.probability(warmup[0])
+        model.predict_proba(warmup)
+        threshold = ABANDONMENT_THRESHOLD if model.threshold is None else model.threshold
+        self._active = (model, threshold, version)
+    
+    def reload(self) -> bool:
+        """Swap in the registry's current version if it changed"""
+        version = self.registry.current_version()
+        if version is None or version == self.version:
+            return False
+        self._activate(self.registry.load(version), version)
+        return True
+    
+    def watch(self, interval: float = MODEL_RELOAD_SECONDS):
+        """Poll the registry from a daemon thread, hot swapping new versions"""
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.reload()
+                except Exception:
+                    # e.g. a truncated weight file; keep serving the current model and retry next poll
+                    logger.exception("Model reload failed")
+        
+        threading.Thread(target=run, name='model-reload', daemon=True).start()
     
     def predict_abandonment(self, cart_data: List[Dict], user_data: Dict) -> Optional[Dict]:
         """Predict cart abandonment probability"""
         if not cart_data:
             return None
+        return self.predict_from_features(self.extract_features(cart_data, user_data))
+    
+    def predict_from_features(self, features: np.ndarray, active: Optional[ActiveModel] = None) -> Optional[Dict]:
+        """Predict from a ready-made feature vector, e.g. FeatureStore.vector()"""
+        if not features[LINE_COUNT_COLUMN]:
+            return None
         
-        probability = 0
-        factors = []
-        
-        # Time-based factors
-        session_duration = self._get_session_duration(user_data)
-        if session_duration > 10:
-            probability += 0.3
-            factors.append('Long session duration')
-        
-        # Cart-based factors
-        cart_value = sum(item['price'] * item['quantity'] for item in cart_data)
-        if cart_value > 20000:
-            probability += 0.2
-            factors.append('High cart value')
-        
-        if len(cart_data) > 5:
-            probability += 0.15
-            factors.append('Many items in cart')
-        
-        # User behavior factors
-        if user_data.get('behavior_score', 0.5) < 0.5:
-            probability += 0.25
-            factors.append('Low engagement score')
-        
-        if user_data.get('previous_purchases', 0) == 0:
-            probability += 0.1
-            factors.append('First-time visitor')
-        
-        # Inactivity factor
-        time_since_last_action = self._get_time_since_last_action(user_data)
-        if time_since_last_action > 1:
-            probability += 0.4
-            factors.append('Inactive for 1+ minute')
-        
-        # Normalize probability
-        probability = min(probability, 1.0)
+        active = self._active if active is None else active
+        probability, mask = self.score(features, active)
         
         return {
             'probability': probability,
-            'confidence': random.uniform(self.confidence_base, 1.0),
-            'factors': factors,
+            # Threshold of the model version that produced the probability
+            'threshold': active[1],
+            # Probability the model assigns to the outcome it predicts
+            'confidence': max(probability, 1.0 - probability),
+            'factors': factors_from_mask(mask),
             'timestamp': datetime.now()
         }
     
+    def extract_features(self, cart_data: List[Dict], user_data: Dict) -> np.ndarray:
+        """Build a session's feature vector, in FEATURES order"""
+        return np.array([
+            self._get_session_duration(user_data),
+            sum(item['price'] * item['quantity'] for item in cart_data),
+            len(cart_data),
+            user_data.get('behavior_score', 0.5),
+            user_data.get('previous_purchases', 0),
+            self._get_time_since_last_action(user_data),
+        ], dtype=np.float64)
+    
+    def score(self, features, active: Optional[ActiveModel] = None) -> Tuple[float, int]:
+        """Probability and factor bitmask for one feature vector"""
+        model = (self._active if active is None else active)[0]
+        probability = 0.0
+        mask = 0
+        for bit, (column, (_, _, test, weight)) in enumerate(zip(RULE_COLUMNS, RULES)):
+            if test(features[column]):
+                probability += weight
+                mask |= 1 << bit
+        
+        if model is not None:
+            return model.probability(features), mask
+        # Normalize probability
+        return min(probability, 1.0), mask
+    
+    def predict_batch(self, features: np.ndarray,
+                      active: Optional[ActiveModel] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Score many sessions at once
+        
+        features is an (n, len(FEATURES)) matrix. Returns the probability
+        vector and the factor bitmasks, matching score() on each row.
+        """
+        model = (self._active if active is None else active)[0]
+        features = np.asarray(features, dtype=np.float64).reshape(-1, len(FEATURES))
+        probability = np.zeros(len(features))
+        masks = np.zeros(len(features), dtype=np.int64)
+        # Same rule order as score(); adding 0.0 for misses leaves each sum bit-identical
+        for bit, (column, (_, _, test, weight)) in enumerate(zip(RULE_COLUMNS, RULES)):
+            hit = test(features[:, column])
+            probability += np.where(hit, weight, 0.0)
+            masks |= hit.astype(np.int64) << bit
+        if model is not None:
+            return model.predict_proba(features), masks
+        return np.minimum(probability, 1.0), masks
+    
     def _get_session_duration(self, user_data: Dict) -> float:
         """Calculate session duration in minutes"""
         session_start = user_data.get('session_start', datetime.now())
@@ -70,4 +194,4 @@ class CartPredictionModel:
         last_interaction = user_data.get('last_interaction', datetime.now())
         if isinstance(last_interaction, str):
             last_interaction = datetime.fromisoformat(last_interaction)
-        return (datetime.now() - last_interaction).total_seconds() / 60
\ No newline at end of file
+        return (datetime.now() - last_interaction).total_seconds() / 60
@@ -0,0 +1,154 @@
+"""Incrementally maintained per-session features for abandonment scoring"""
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from config.settings import FEATURE_WINDOW_MINUTES
+from models.cart_prediction import FEATURES
+
+
+class UnknownSession(KeyError):
+    """The session was never started or has been ended"""
+
+
+class SessionFeatures:
+    """Running counters for one session, updated in O(1) per event"""
+
+    __slots__ = ('session_start', 'last_action', 'behavior_score', 'previous_purchases',
+                 'cart_value', 'line_count', 'item_count', 'adds', 'removes',
+                 'recent', 'recent_adds', 'recent_value_change')
+
+    def __init__(self, session_start: float, behavior_score: float, previous_purchases: int):
+        self.session_start = session_start
+        self.last_action = session_start
+        self.behavior_score = behavior_score
+        self.previous_purchases = previous_purchases
+        self.cart_value = 0.0
+        self.line_count = 0
+        self.item_count = 0
+        self.adds = 0
+        self.removes = 0
+        # (timestamp, items added, cart value change) for events inside the window
+        self.recent = deque()
+        self.recent_adds = 0
+        self.recent_value_change = 0.0
+
+    def evict(self, now: float, window: float):
+        """Drop windowed events older than the window; amortized O(1)"""
+        while self.recent and self.recent[0][0] < now - window:
+            _, added, value_change = self.recent.popleft()
+            self.recent_adds -= added
+            self.recent_value_change -= value_change
+        if not self.recent:
+            # Don't let float rounding drift accumulate across windows
+            self.recent_value_change = 0.0
+
+
+class FeatureStore:
+    """Per-session feature vectors fed by cart and browse events
+
+    Shared by every session in the process; each event updates its
+    session's counters in constant time, and vector() hands the model a
+    ready-made feature row in FEATURES order. Sessions stay until
+    end_session(); readers and event handlers raise UnknownSession after that.
+    """
+
+    def __init__(self, window_minutes: float = FEATURE_WINDOW_MINUTES):
+        self.window = window_minutes * 60
+        self._sessions: Dict[str, SessionFeatures] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, session_id: str):
+        return session_id in self._sessions
+
+    def _session(self, session_id: str) -> SessionFeatures:
+        features = self._sessions.get(session_id)
+        if features is None:
+            raise UnknownSession(session_id)
+        return features
+
+    def start_session(self, session_id: str, user_data: Dict, cart=None):
+        """Register a session, seeding it from the user profile and any restored cart"""
+        session_start = user_data.get('session_start', datetime.now())
+        if isinstance(session_start, str):
+            session_start = datetime.fromisoformat(session_start)
+        features = SessionFeatures(
+            session_start.timestamp(),
+            user_data.get('behavior_score', 0.5),
+            user_data.get('previous_purchases', 0),
+        )
+        if cart is not None:
+            features.cart_value = cart.subtotal
+            features.line_count = len(cart)
+            features.item_count = cart.item_count
+        with self._lock:
+            self._sessions[session_id] = features
+
+    def on_cart_change(self, session_id: str, cart, now: Optional[float] = None):
+        """Fold a cart mutation into the session's features"""
+        now = time.time() if now is None else now
+        with self._lock:
+            features = self._session(session_id)
+            added = cart.item_count - features.item_count
+            value_change = cart.subtotal - features.cart_value
+            if added > 0:
+                features.adds += added
+            elif added < 0:
+                features.removes -= added
+
+            features.recent.append((now, max(added, 0), value_change))
+            features.recent_adds += max(added, 0)
+            features.recent_value_change += value_change
+            features.evict(now, self.window)
+
+            features.cart_value = cart.subtotal
+            features.line_count = len(cart)
+            features.item_count = cart.item_count
+            features.last_action = now
+
+    def on_browse(self, session_id: str, now: Optional[float] = None):
+        """Record a browsing action such as a search or page change"""
+        with self._lock:
+            self._session(session_id).last_action = time.time() if now is None else now
+
+    def end_session(self, session_id: str):
+        """Forget a session"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def elapsed(self, session_id: str, now: Optional[float] = None) -> Tuple[float, float]:
+        """Minutes since the session started and since its last action"""
+        now = time.time() if now is None else now
+        features = self._session(session_id)
+        return (now - features.session_start) / 60, (now - features.last_action) / 60
+
+    def vector(self, session_id: str, now: Optional[float] = None) -> np.ndarray:
+        """The session's model features, in FEATURES order"""
+        now = time.time() if now is None else now
+        features = self._session(session_id)
+        values = {
+            'session_duration': (now - features.session_start) / 60,
+            'cart_value': features.cart_value,
+            'line_count': features.line_count,
+            'behavior_score': features.behavior_score,
+            'previous_purchases': features.previous_purchases,
+            'idle_minutes': (now - features.last_action) / 60,
+        }
+        return np.array([values[name] for name in FEATURES], dtype=np.float64)
+
+    def rolling(self, session_id: str, now: Optional[float] = None) -> Dict[str, float]:
+        """Windowed behaviour features for a session"""
+        now = time.time() if now is None else now
+        with self._lock:
+            features = self._session(session_id)
+            features.evict(now, self.window)
+            return {
+                'recent_adds': features.recent_adds,
+                'add_remove_ratio': features.adds / max(features.removes, 1),
+                'idle_minutes': (now - features.last_action) / 60,
+                'value_velocity': features.recent_value_change / (self.window / 60),
+            }
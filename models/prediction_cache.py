@@ -0,0 +1,54 @@
+"""TTL + LRU cache of abandonment predictions"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from config.settings import PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL_SECONDS
+
+
+class PredictionCache:
+    """Latest prediction per user, reused while the user's state key is unchanged
+
+    The state key is whatever the prediction depends on: cart version and
+    coarse time buckets. Each user holds one entry, so a cart change or a
+    bucket crossing simply replaces it. Entries expire after ttl seconds
+    and the least recently used user is evicted beyond max_entries.
+    """
+
+    def __init__(self, max_entries: int = PREDICTION_CACHE_SIZE, ttl: float = PREDICTION_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # user_id -> (state key, expires at, prediction)
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_compute(self, user_id: str, state: Hashable, compute: Callable[[], Any],
+                       now: Optional[float] = None) -> Any:
+        """Cached prediction for user_id at state, computing it on a miss"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] == state and entry[1] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        prediction = compute()
+        with self._lock:
+            self._entries[user_id] = (state, now + self.ttl, prediction)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return prediction
+
+    def invalidate(self, user_id: str):
+        """Drop a user's cached prediction, e.g. when their session restarts"""
+        with self._lock:
+            self._entries.pop(user_id, None)
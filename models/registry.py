@@ -0,0 +1,96 @@
+"""Versioned model weight files with an atomically switched current version
+
+    registry/
+        abandonment-v0001.bin
+        abandonment-v0002.bin
+        CURRENT                 version number in use, e.g. "2"
+
+Publishing writes a new version file and then replaces CURRENT, both via
+os.replace, so a reader sees either the old version or the new one, never
+a partial file. Rolling back is pointing CURRENT at an older version.
+"""
+import argparse
+import os
+import re
+from typing import List, Optional
+
+from config.settings import MODEL_REGISTRY_DIR
+from models.logistic import LogisticModel
+
+
+class ModelRegistry:
+    """Directory of versioned weight files for one model"""
+
+    def __init__(self, directory: str = MODEL_REGISTRY_DIR, name: str = 'abandonment'):
+        self.directory = directory
+        self.name = name
+        self._pattern = re.compile(rf'{re.escape(name)}-v(\d+)\.bin$')
+
+    def path(self, version: int) -> str:
+        return os.path.join(self.directory, f'{self.name}-v{version:04d}.bin')
+
+    def versions(self) -> List[int]:
+        """Published versions, oldest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        matches = (self._pattern.match(entry) for entry in os.listdir(self.directory))
+        return sorted(int(match.group(1)) for match in matches if match)
+
+    def current_version(self) -> Optional[int]:
+        """Version in use, or None if nothing has been published"""
+        try:
+            with open(os.path.join(self.directory, 'CURRENT'), encoding='utf-8') as f:
+                return int(f.read().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def load(self, version: int) -> LogisticModel:
+        return LogisticModel.load(self.path(version))
+
+    def publish(self, model: LogisticModel, promote: bool = True) -> int:
+        """Store model as the next version and, by default, make it current"""
+        os.makedirs(self.directory, exist_ok=True)
+        version = max(self.versions(), default=0) + 1
+        model.save(self.path(version))
+        if promote:
+            self.promote(version)
+        return version
+
+    def promote(self, version: int):
+        """Make a published version current"""
+        if not os.path.exists(self.path(version)):
+            raise ValueError(f"No {self.name} model version {version} in {self.directory}")
+        pointer = os.path.join(self.directory, 'CURRENT')
+        with open(f'{pointer}.tmp', 'w', encoding='utf-8') as f:
+            f.write(f'{version}\n')
+        os.replace(f'{pointer}.tmp', pointer)
+
+
+def main():
+    """Publish, promote or list abandonment model versions"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--registry', default=MODEL_REGISTRY_DIR, help="Registry directory")
+    commands = parser.add_subparsers(dest='command', required=True)
+    publish = commands.add_parser('publish', help="Add a weight file as a new version and make it current")
+    publish.add_argument('weights', help="Weight file written by `python -m models.logistic`")
+    publish.add_argument('--no-promote', action='store_true', help="Publish without switching to it")
+    promote = commands.add_parser('promote', help="Switch to a published version, e.g. to roll back")
+    promote.add_argument('version', type=int)
+    commands.add_parser('list', help="Show published versions")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry)
+    if args.command == 'publish':
+        version = registry.publish(LogisticModel.load(args.weights), promote=not args.no_promote)
+        print(f"Published version {version}")
+    elif args.command == 'promote':
+        registry.promote(args.version)
+        print(f"Version {args.version} is now current")
+    else:
+        current = registry.current_version()
+        for version in registry.versions():
+            print(f"{version}{' (current)' if version == current else ''}")
+
+
+if __name__ == '__main__':
+    main()
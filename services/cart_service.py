@@ -1,83 +1,361 @@
 """Cart management service"""
-from datetime import datetime
-from typing import Dict, List, Any
+import time
+from typing import Dict, Iterable, List, Any, Callable, Mapping, Optional, Tuple
+
+import numpy as np
+
+from config.settings import (FREE_SHIPPING_THRESHOLD, MAX_CART_ITEMS, MAX_QUANTITY_PER_ITEM,
+                             SHIPPING_COST, TAX_RATE)
+from services.cart_store import CartStore
+
+def to_paise(amounts) -> np.ndarray:
+    """Convert rupee amounts to integer paise, rounding to the nearest paisa"""
+    return np.rint(np.asarray(amounts, dtype=np.float64) * 100).astype(np.int64)
+
+def quote_carts(cart_ids, prices, quantities,
+                free_shipping_threshold: float = FREE_SHIPPING_THRESHOLD,
+                tax_rate: float = TAX_RATE, shipping_cost: float = SHIPPING_COST) -> Dict[str, np.ndarray]:
+    """Price many carts at once in exact integer paise
+    
+    Takes one entry per cart line as flat arrays (prices in rupees) and
+    returns per-cart arrays, ordered by cart id: cart_id, item_count, and
+    subtotal, shipping, tax and total in paise. GST is rounded half up to
+    the paisa.
+    """
+    cart_ids = np.asarray(cart_ids)
+    quantities = np.asarray(quantities, dtype=np.int64)
+    line_totals = to_paise(prices) * quantities
+    if len(cart_ids) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return {'cart_id': cart_ids[:0], 'item_count': empty, 'subtotal': empty,
+                'shipping': empty, 'tax': empty, 'total': empty}
+    
+    # Group lines by cart, then reduce each contiguous run
+    order = np.argsort(cart_ids, kind='stable')
+    sorted_ids = cart_ids[order]
+    starts = np.concatenate(([0], np.flatnonzero(sorted_ids[1:] != sorted_ids[:-1]) + 1))
+    subtotal = np.add.reduceat(line_totals[order], starts)
+    item_count = np.add.reduceat(quantities[order], starts)
+    
+    threshold = int(round(free_shipping_threshold * 100))
+    shipping = np.where(subtotal >= threshold, 0, int(round(shipping_cost * 100)))
+    rate_basis_points = int(round(tax_rate * 10000))
+    tax = (subtotal * rate_basis_points + 5000) // 10000
+    
+    return {
+        'cart_id': sorted_ids[starts],
+        'item_count': item_count,
+        'subtotal': subtotal,
+        'shipping': shipping,
+        'tax': tax,
+        'total': subtotal + shipping + tax
+    }
+
+class CartItem:
+    """Slotted cart line referencing its catalog product
+    
+    The product is kept by reference (a catalog Product record or the
+    caller's dict), so name, price and image are never copied per line.
+    Timestamps are epoch seconds. Supports dict-style reads.
+    """
+    
+    __slots__ = ('product', 'quantity', 'added_at', 'last_interaction')
+    FIELDS = ('id', 'name', 'price', 'quantity', 'image', 'added_at', 'last_interaction')
+    
+    def __init__(self, product: Mapping, quantity: int = 1, added_at: Optional[int] = None):
+        now = int(time.time())
+        self.product = product
+        self.quantity = quantity
+        self.added_at = now if added_at is None else added_at
+        self.last_interaction = now
+    
+    @property
+    def id(self) -> str:
+        return self.product['id']
+    
+    @property
+    def name(self) -> str:
+        return self.product['name']
+    
+    @property
+    def price(self) -> float:
+        return self.product['price']
+    
+    @property
+    def image(self) -> str:
+        return self.product['image']
+    
+    def __getitem__(self, key: str):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self.FIELDS else default
+    
+    def touch(self):
+        """Record an interaction with this line"""
+        self.last_interaction = int(time.time())
+    
+    def to_dict(self) -> Dict:
+        """Copy the line into a plain dict"""
+        return {key: getattr(self, key) for key in self.FIELDS}
+
+class Cart:
+    """Cart line items in display order, indexed by product id
+    
+    Every mutation goes through this class so the subtotal and item count
+    can be kept up to date incrementally; `version` increases on each
+    change, letting readers cache anything derived from the cart.
+    """
+    
+    def __init__(self, items: Optional[Iterable[CartItem]] = None,
+                 free_shipping_threshold: float = FREE_SHIPPING_THRESHOLD,
+                 tax_rate: float = TAX_RATE, shipping_cost: float = SHIPPING_COST,
+                 owner_id: Optional[str] = None):
+        self.owner_id = owner_id
+        self.free_shipping_threshold = free_shipping_threshold
+        self.tax_rate = tax_rate
+        self.shipping_cost = shipping_cost
+        # dicts keep insertion order, so one map serves as both index and display list
+        self._items: Dict[str, CartItem] = {}
+        self.version = 0
+        # Running subtotal in integer paise, like quote_carts, so it never drifts
+        self._subtotal_paise = 0
+        self.item_count = 0
+        self._totals: Optional[Dict[str, float]] = None
+        self._totals_version = -1
+        for item in items or ():
+            self.add(item)
+    
+    def __iter__(self):
+        return iter(self._items.values())
+    
+    def __len__(self):
+        return len(self._items)
+    
+    def __contains__(self, product_id: str):
+        return product_id in self._items
+    
+    def get(self, product_id: str) -> Optional[CartItem]:
+        """Get the line item for a product, if present"""
+        return self._items.get(product_id)
+    
+    def add(self, item: CartItem):
+        """Add a line item, replacing any existing line for the same product"""
+        self.remove(item.id)
+        self._items[item.id] = item
+        self._apply(item.price, item.quantity)
+    
+    def set_quantity(self, product_id: str, quantity: int) -> Optional[CartItem]:
+        """Change a line's quantity, removing it when quantity drops to zero"""
+        item = self._items.get(product_id)
+        if item is None:
+            return None
+        if quantity <= 0:
+            self.remove(product_id)
+            return None
+        self._apply(item.price, quantity - item.quantity)
+        item.quantity = quantity
+        return item
+    
+    def remove(self, product_id: str) -> Optional[CartItem]:
+        """Remove and return the line item for a product"""
+        item = self._items.pop(product_id, None)
+        if item is not None:
+            self._apply(item.price, -item.quantity)
+        return item
+    
+    def clear(self):
+        """Remove all line items"""
+        self._items.clear()
+        self._subtotal_paise = 0
+        self.item_count = 0
+        self.version += 1
+    
+    def copy(self) -> List[Dict]:
+        """Snapshot of the line items as a list of dicts"""
+        return [item.to_dict() for item in self._items.values()]
+    
+    @property
+    def subtotal(self) -> float:
+        # Whole rupees stay ints so they display as they did before, e.g. ₹99,999
+        paise = self._subtotal_paise
+        return paise // 100 if paise % 100 == 0 else paise / 100
+    
+    @property
+    def shipping(self) -> float:
+        return 0 if self.subtotal >= self.free_shipping_threshold else self.shipping_cost
+    
+    @property
+    def tax(self) -> float:
+        return self.subtotal * self.tax_rate
+    
+    @property
+    def total(self) -> float:
+        return self.subtotal + self.shipping + self.tax
+    
+    def totals(self) -> Dict[str, float]:
+        """Cart totals, recomputed only when the cart has changed"""
+        if self._totals_version != self.version:
+            self._totals = {
+                'subtotal': self.subtotal,
+                'shipping': self.shipping,
+                'tax': self.tax,
+                'total': self.total,
+                'item_count': self.item_count
+            }
+            self._totals_version = self.version
+        return self._totals
+    
+    def shipping_progress(self) -> Dict[str, Any]:
+        """Free shipping progress"""
+        if self.subtotal >= self.free_shipping_threshold:
+            return {
+                'qualified': True,
+                'remaining': 0,
+                'progress': 1.0
+            }
+        return {
+            'qualified': False,
+            'remaining': self.free_shipping_threshold - self.subtotal,
+            'progress': self.subtotal / self.free_shipping_threshold
+        }
+    
+    def _apply(self, price: float, quantity_delta: int):
+        """Fold a quantity change into the running totals"""
+        self._subtotal_paise += int(round(price * 100)) * quantity_delta
+        self.item_count += quantity_delta
+        self.version += 1
 
 class CartService:
-    """Handle cart operations and calculations"""
-    
-    def __init__(self):
-        self.free_shipping_threshold = 20000
-        self.tax_rate = 0.18
-        self.shipping_cost = 499
-    
-    def add_to_cart(self, cart: List[Dict], product: Dict) -> List[Dict]:
-        """Add product to cart"""
-        # Check if product already exists
-        for item in cart:
-            if item['id'] == product['id']:
-                item['quantity'] += 1
-                item['last_interaction'] = datetime.now()
-                return cart
+    """Handle cart operations and calculations
+    
+    With a CartStore, every cart mutation made through the service is
+    persisted for the cart's owner in the background.
+    """
+    
+    def __init__(self, store: Optional[CartStore] = None):
+        self.free_shipping_threshold = FREE_SHIPPING_THRESHOLD
+        self.tax_rate = TAX_RATE
+        self.shipping_cost = SHIPPING_COST
+        self.max_cart_items = MAX_CART_ITEMS
+        self.max_quantity_per_item = MAX_QUANTITY_PER_ITEM
+        self.store = store
+    
+    def new_cart(self, items: Optional[Iterable[CartItem]] = None, owner_id: Optional[str] = None) -> Cart:
+        """Create a cart priced with this service's settings"""
+        return Cart(items, self.free_shipping_threshold, self.tax_rate, self.shipping_cost, owner_id)
+    
+    def load_cart(self, user_id: str, get_product: Callable[[str], Optional[Mapping]]) -> Cart:
+        """Restore a user's saved cart, dropping products no longer in the catalog"""
+        cart = self.new_cart(owner_id=user_id)
+        if self.store is None:
+            return cart
         
-        # Add new item
-        cart_item = {
-            'id': product['id'],
-            'name': product['name'],
-            'price': product['price'],
-            'quantity': 1,
-            'image': product['image'],
-            'added_at': datetime.now(),
-            'last_interaction': datetime.now()
-        }
-        cart.append(cart_item)
+        for product_id, quantity, added_at, last_interaction in self.store.load(user_id):
+            product = get_product(product_id)
+            if product is None:
+                continue
+            item = CartItem(product, quantity, added_at)
+            item.last_interaction = last_interaction
+            cart.add(item)
+        return cart
+    
+    def clear_cart(self, cart: Cart) -> Cart:
+        """Remove every item from the cart"""
+        cart.clear()
+        self._persist(cart)
+        return cart
+    
+    def _persist(self, cart: Cart):
+        """Queue the cart's current lines for writing"""
+        if self.store is not None and cart.owner_id is not None:
+            self.store.save(cart.owner_id, [
+                (item.id, item.quantity, item.added_at, item.last_interaction) for item in cart
+            ])
+    
+    def add_to_cart(self, cart: Cart, product: Dict) -> Cart:
+        """Add product to cart
+        
+        Raises ValueError, leaving the cart unchanged, when the cart is full
+        or the product is already at max_quantity_per_item.
+        """
+        if not self._add(cart, product, 1):
+            if product['id'] in cart:
+                raise ValueError(f"You can add at most {self.max_quantity_per_item} of {product['name']}")
+            raise ValueError(f"Your cart can hold at most {self.max_cart_items} products")
+        self._persist(cart)
+        return cart
+    
+    def add_many(self, cart: Cart, items: Iterable[Tuple[Mapping, int]]) -> Cart:
+        """Add (product, quantity) pairs in one pass, e.g. to reorder a past order
+        
+        Quantities are clamped to max_quantity_per_item, and new lines
+        beyond max_cart_items are skipped. The cart is persisted once.
+        """
+        for product, quantity in items:
+            self._add(cart, product, quantity)
+        self._persist(cart)
         return cart
     
-    def remove_from_cart(self, cart: List[Dict], product_id: str) -> List[Dict]:
+    def set_quantities(self, cart: Cart, quantities: Mapping[str, int]) -> Cart:
+        """Set several line quantities in one pass; zero or less removes the line"""
+        for product_id, quantity in quantities.items():
+            item = cart.set_quantity(product_id, min(quantity, self.max_quantity_per_item))
+            if item is not None:
+                item.touch()
+        self._persist(cart)
+        return cart
+    
+    def merge(self, cart_a: Cart, cart_b: Cart) -> Cart:
+        """Merge cart_b into cart_a, e.g. a guest cart into the user's saved cart
+        
+        Quantities of shared products are added, subject to the same limits
+        as add_many. cart_b is left unchanged.
+        """
+        return self.add_many(cart_a, ((item.product, item.quantity) for item in cart_b))
+    
+    def _add(self, cart: Cart, product: Mapping, quantity: int) -> int:
+        """Add quantity of a product within the per-item and per-cart limits; returns how many were added"""
+        if quantity <= 0:
+            return 0
+        item = cart.get(product['id'])
+        if item is not None:
+            added = max(min(item.quantity + quantity, self.max_quantity_per_item) - item.quantity, 0)
+            if added:
+                cart.set_quantity(item.id, item.quantity + added)
+            item.touch()
+            return added
+        if len(cart) >= self.max_cart_items:
+            return 0
+        added = min(quantity, self.max_quantity_per_item)
+        cart.add(CartItem(product, added))
+        return added
+    
+    def remove_from_cart(self, cart: Cart, product_id: str) -> Cart:
         """Remove product from cart"""
-        return [item for item in cart if item['id'] != product_id]
+        cart.remove(product_id)
+        self._persist(cart)
+        return cart
     
-    def update_quantity(self, cart: List[Dict], product_id: str, quantity: int) -> List[Dict]:
+    def update_quantity(self, cart: Cart, product_id: str, quantity: int) -> Cart:
         """Update quantity of item in cart"""
-        if quantity <= 0:
-            return self.remove_from_cart(cart, product_id)
-        
-        for item in cart:
-            if item['id'] == product_id:
-                item['quantity'] = quantity
-                item['last_interaction'] = datetime.now()
-                break
+        item = cart.set_quantity(product_id, min(quantity, self.max_quantity_per_item))
+        if item is not None:
+            item.touch()
+        self._persist(cart)
         return cart
     
-    def calculate_cart_totals(self, cart: List[Dict]) -> Dict[str, float]:
+    def calculate_cart_totals(self, cart: Cart) -> Dict[str, float]:
         """Calculate cart totals"""
-        subtotal = sum(item['price'] * item['quantity'] for item in cart)
-        shipping = 0 if subtotal >= self.free_shipping_threshold else self.shipping_cost
-        tax = subtotal * self.tax_rate
-        total = subtotal + shipping + tax
-        
-        return {
-            'subtotal': subtotal,
-            'shipping': shipping,
-            'tax': tax,
-            'total': total,
-            'item_count': sum(item['quantity'] for item in cart)
-        }
+        return cart.totals()
+    
+    def quote_carts(self, cart_ids, prices, quantities) -> Dict[str, np.ndarray]:
+        """Price many carts at once in integer paise with this service's settings"""
+        return quote_carts(cart_ids, prices, quantities,
+                           self.free_shipping_threshold, self.tax_rate, self.shipping_cost)
     
-    def get_shipping_progress(self, cart: List[Dict]) -> Dict[str, Any]:
+    def get_shipping_progress(self, cart: Cart) -> Dict[str, Any]:
         """Get free shipping progress"""
-        subtotal = sum(item['price'] * item['quantity'] for item in cart)
-        
-        if subtotal >= self.free_shipping_threshold:
-            return {
-                'qualified': True,
-                'remaining': 0,
-                'progress': 1.0
-            }
-        else:
-            remaining = self.free_shipping_threshold - subtotal
-            progress = subtotal / self.free_shipping_threshold
-            return {
-                'qualified': False,
-                'remaining': remaining,
-                'progress': progress
-            }
\ No newline at end of file
+        return cart.shipping_progress()
@@ -0,0 +1,129 @@
+"""Durable cart storage in SQLite"""
+import atexit
+import sqlite3
+import threading
+from typing import Dict, List, Tuple
+
+from config.settings import CART_DB_PATH, CART_FLUSH_INTERVAL_SECONDS
+
+# (product_id, quantity, added_at, last_interaction)
+CartRow = Tuple[str, int, int, int]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cart_lines (
+    user_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    product_id TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    added_at INTEGER NOT NULL,
+    last_interaction INTEGER NOT NULL,
+    PRIMARY KEY (user_id, position)
+) WITHOUT ROWID
+"""
+
+
+class CartStore:
+    """SQLite (WAL) cart store with coalesced, batched background writes
+
+    save() only records the latest snapshot for a user in memory; a writer
+    thread flushes every pending snapshot in one transaction per interval,
+    so any number of edits to a cart between flushes cost a single write
+    and the request path never waits on disk.
+    """
+
+    def __init__(self, path: str = CART_DB_PATH, flush_interval: float = CART_FLUSH_INTERVAL_SECONDS):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, List[CartRow]] = {}
+        self._in_flight: Dict[str, List[CartRow]] = {}
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+
+        self._reader = self._connect()
+        self._reader_lock = threading.Lock()
+        self._writer = self._connect()
+        self._writer.execute(SCHEMA)
+        self._writer.commit()
+
+        self._thread = threading.Thread(target=self._run, name='cart-store-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        # WAL with NORMAL sync survives process crashes; only an OS crash can lose the last flush
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def save(self, user_id: str, rows: List[CartRow]):
+        """Queue a user's cart snapshot, replacing any snapshot not yet written"""
+        with self._pending_lock:
+            self._pending[user_id] = rows
+
+    def load(self, user_id: str) -> List[CartRow]:
+        """Latest cart snapshot for a user, including writes still pending"""
+        with self._pending_lock:
+            pending = self._pending.get(user_id, self._in_flight.get(user_id))
+        if pending is not None:
+            return list(pending)
+
+        with self._reader_lock:
+            return self._reader.execute(
+                'SELECT product_id, quantity, added_at, last_interaction FROM cart_lines '
+                'WHERE user_id = ? ORDER BY position',
+                (user_id,)
+            ).fetchall()
+
+    def flush(self):
+        """Write every pending snapshot in a single transaction"""
+        with self._write_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, {}
+                self._in_flight = pending
+            if pending:
+                self._write(pending)
+
+    def _write(self, pending: Dict[str, List[CartRow]]):
+        try:
+            with self._writer:
+                self._writer.executemany('DELETE FROM cart_lines WHERE user_id = ?', [(user_id,) for user_id in pending])
+                self._writer.executemany(
+                    'INSERT INTO cart_lines VALUES (?, ?, ?, ?, ?, ?)',
+                    [
+                        (user_id, position) + tuple(row)
+                        for user_id, rows in pending.items()
+                        for position, row in enumerate(rows)
+                    ]
+                )
+        except sqlite3.Error:
+            # Put the snapshots back unless a newer one arrived meanwhile
+            with self._pending_lock:
+                for user_id, rows in pending.items():
+                    self._pending.setdefault(user_id, rows)
+            raise
+        finally:
+            with self._pending_lock:
+                self._in_flight = {}
+
+    def close(self):
+        """Flush outstanding writes and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        self._writer.close()
+        self._reader.close()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # Snapshots stay queued; retry on the next tick
+                continue
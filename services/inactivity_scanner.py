@@ -0,0 +1,173 @@
+"""Background scoring of idle sessions"""
+import heapq
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config.settings import (
+    INTERVENTION_DELAY_MINUTES, SCANNER_BATCH_SIZE, SCANNER_TICK_SECONDS,
+    SESSION_TIMEOUT_MINUTES
+)
+from models.cart_prediction import FEATURES, CartPredictionModel
+from models.feature_store import FeatureStore, UnknownSession
+from services.intervention_scheduler import InterventionScheduler
+from services.intervention_service import InterventionService
+
+CART_VALUE_COLUMN = FEATURES.index('cart_value')
+IDLE_COLUMN = FEATURES.index('idle_minutes')
+LINE_COUNT_COLUMN = FEATURES.index('line_count')
+
+logger = logging.getLogger(__name__)
+
+
+class InactivityScanner:
+    """Scores sessions once they go idle, without waiting for a page rerun
+
+    Every session has a next-check deadline, kept in a min-heap; activity
+    pushes the deadline back. A worker thread wakes every interval, pops
+    at most batch_size due sessions, scores them in one predict_batch call
+    and queues an intervention for each session over the threshold. The
+    app picks queued interventions up with take() on its next render.
+    Sessions idle for session_timeout are dropped from the feature store.
+    """
+
+    def __init__(self, feature_store: FeatureStore, model: CartPredictionModel,
+                 intervention_service: InterventionService,
+                 interval: float = SCANNER_TICK_SECONDS, batch_size: int = SCANNER_BATCH_SIZE,
+                 idle_delay: float = INTERVENTION_DELAY_MINUTES * 60,
+                 session_timeout: float = SESSION_TIMEOUT_MINUTES * 60,
+                 threshold: Optional[float] = None, scheduler: Optional[InterventionScheduler] = None,
+                 start: bool = True):
+        self.feature_store = feature_store
+        self.model = model
+        self.intervention_service = intervention_service
+        self.interval = interval
+        self.batch_size = batch_size
+        self.idle_delay = idle_delay
+        self.session_timeout = session_timeout
+        # None follows the model's own threshold, which can change on a hot swap
+        self.threshold = threshold
+        self.scheduler = scheduler
+
+        # (deadline, session_id); entries whose deadline no longer matches
+        # _deadlines are stale and skipped when popped
+        self._heap: List = []
+        self._deadlines: Dict[str, float] = {}
+        self._outbox: Dict[str, List[Dict]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if start:
+            self._thread = threading.Thread(target=self._run, name='inactivity-scanner', daemon=True)
+            self._thread.start()
+
+    def touch(self, session_id: str, now: Optional[float] = None):
+        """Record activity: the session is next checked idle_delay from now"""
+        deadline = (time.time() if now is None else now) + self.idle_delay
+        with self._lock:
+            self._deadlines[session_id] = deadline
+            heapq.heappush(self._heap, (deadline, session_id))
+            if len(self._heap) > 2 * len(self._deadlines) + 64:
+                # Mostly stale entries from repeated activity; rebuild
+                self._heap = [(d, s) for s, d in self._deadlines.items()]
+                heapq.heapify(self._heap)
+
+    def forget(self, session_id: str):
+        """Stop tracking a session"""
+        with self._lock:
+            self._deadlines.pop(session_id, None)
+            self._outbox.pop(session_id, None)
+
+    def take(self, session_id: str) -> List[Dict]:
+        """Interventions queued for a session since the last call"""
+        with self._lock:
+            return self._outbox.pop(session_id, [])
+
+    def tick(self, now: Optional[float] = None) -> int:
+        """Score up to batch_size due sessions; returns how many were scored"""
+        now = time.time() if now is None else now
+        due = []
+        with self._lock:
+            for _ in range(self.batch_size):
+                if not self._heap or self._heap[0][0] > now:
+                    break
+                deadline, session_id = heapq.heappop(self._heap)
+                if self._deadlines.get(session_id) == deadline:
+                    del self._deadlines[session_id]
+                    due.append(session_id)
+
+        sessions, rows = [], []
+        for session_id in due:
+            try:
+                rows.append(self.feature_store.vector(session_id, now))
+            except UnknownSession:
+                continue  # session ended
+            sessions.append(session_id)
+        if not rows:
+            return 0
+
+        features = np.array(rows)
+        # One snapshot, so a hot swap can't pair one version's threshold with another's scores
+        active = self.model.active
+        probabilities, _ = self.model.predict_batch(features, active)
+        threshold = active[1] if self.threshold is None else self.threshold
+        flagged = (probabilities > threshold) & (features[:, LINE_COUNT_COLUMN] > 0)
+
+        candidates = []
+        with self._lock:
+            for session_id, row, is_flagged in zip(sessions, features, flagged.tolist()):
+                if session_id in self._deadlines:
+                    continue  # active again while being scored
+                idle_seconds = row[IDLE_COLUMN] * 60
+                if idle_seconds >= self.session_timeout:
+                    self._expire(session_id)
+                    continue
+                if is_flagged:
+                    # One offer per idle spell; the next activity re-arms the session,
+                    # otherwise it is only checked again to expire it
+                    candidates.append((session_id, float(row[CART_VALUE_COLUMN])))
+                    deadline = now + self.session_timeout - idle_seconds
+                else:
+                    deadline = now + self.idle_delay
+                self._deadlines[session_id] = deadline
+                heapq.heappush(self._heap, (deadline, session_id))
+
+        # Build messages without holding the lock, so touch() from renders never waits on them
+        generated = [(session_id, self._generate(session_id, cart_value, now)) for session_id, cart_value in candidates]
+        with self._lock:
+            for session_id, intervention in generated:
+                if intervention is not None:
+                    self._outbox.setdefault(session_id, []).append(intervention)
+        return len(sessions)
+
+    def _expire(self, session_id: str):
+        """Drop a timed-out session's features and undelivered interventions"""
+        self.feature_store.end_session(session_id)
+        self._outbox.pop(session_id, None)
+
+    def _generate(self, session_id: str, cart_value: float, now: float) -> Optional[Dict]:
+        if self.scheduler is None:
+            return self.intervention_service.generate_intervention(cart_value, {'id': session_id})
+        if not self.scheduler.ready(session_id, now):
+            return None
+        return self.intervention_service.generate_intervention(
+            cart_value, {'id': session_id}, self.scheduler.recent_types(session_id, now),
+            acquire=lambda offer_type: self.scheduler.try_acquire(session_id, offer_type, now)
+        )
+
+    def close(self):
+        """Stop the worker thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.tick()
+            except Exception:
+                # Keep scanning; due sessions popped this tick wait for their next activity
+                logger.exception("Inactivity scan failed")
@@ -0,0 +1,84 @@
+"""Thompson-sampling choice of intervention offers"""
+import random
+import threading
+from bisect import bisect_right
+from typing import Collection, List, Optional, Sequence
+
+import numpy as np
+
+from config.settings import BANDIT_CART_VALUE_BANDS, BANDIT_PRIOR_STRENGTH
+
+
+class InterventionBandit:
+    """Beta-Bernoulli Thompson sampling over offers, per cart-value band
+
+    Each (band, arm) keeps a trial and a success counter. Arm priors are
+    Beta(weight * strength, (1 - weight) * strength), so an arm starts out
+    expected to succeed at its configured weight and observed outcomes take
+    over once they outnumber the prior strength. Selection draws one sample
+    per arm; updates are single counter increments.
+    """
+
+    def __init__(self, arm_types: Sequence[str], prior_weights: Sequence[float],
+                 band_edges: Sequence[float] = BANDIT_CART_VALUE_BANDS,
+                 prior_strength: float = BANDIT_PRIOR_STRENGTH, rng: Optional[random.Random] = None):
+        self.arm_types = list(arm_types)
+        self.band_edges = list(band_edges)
+        self.prior_alpha = [max(weight * prior_strength, 1e-3) for weight in prior_weights]
+        self.prior_beta = [max((1 - weight) * prior_strength, 1e-3) for weight in prior_weights]
+        bands = len(self.band_edges) + 1
+        self.trials: List[List[int]] = [[0] * len(self.arm_types) for _ in range(bands)]
+        self.successes: List[List[int]] = [[0] * len(self.arm_types) for _ in range(bands)]
+        self._rng = rng or random.Random()
+        self._np_rng = np.random.default_rng(self._rng.getrandbits(64))
+        self._lock = threading.Lock()
+
+    def band(self, cart_value: float) -> int:
+        """Cart-value band index"""
+        return bisect_right(self.band_edges, cart_value)
+
+    def select(self, band: int, exclude_types: Collection[str] = ()) -> Optional[int]:
+        """Arm with the highest posterior sample, skipping excluded offer types"""
+        trials, successes = self.trials[band], self.successes[band]
+        betavariate = self._rng.betavariate
+        best, best_sample = None, -1.0
+        for arm, arm_type in enumerate(self.arm_types):
+            if arm_type in exclude_types:
+                continue
+            sample = betavariate(self.prior_alpha[arm] + successes[arm],
+                                 self.prior_beta[arm] + trials[arm] - successes[arm])
+            if sample > best_sample:
+                best, best_sample = arm, sample
+        return best
+
+    def select_batch(self, bands: np.ndarray) -> np.ndarray:
+        """select() for many sessions at once, one posterior draw per session and arm"""
+        bands = np.asarray(bands, dtype=np.intp)
+        trials = np.array(self.trials, dtype=np.float64)
+        successes = np.array(self.successes, dtype=np.float64)
+        alpha = np.array(self.prior_alpha) + successes
+        beta = np.array(self.prior_beta) + trials - successes
+        return self._np_rng.beta(alpha[bands], beta[bands]).argmax(axis=1)
+
+    def record_trials(self, bands: np.ndarray, arms: np.ndarray):
+        """record_trial() for every (band, arm) pair"""
+        counts = np.zeros((len(self.trials), len(self.arm_types)), dtype=np.int64)
+        np.add.at(counts, (bands, arms), 1)
+        with self._lock:
+            for band, arm in zip(*np.nonzero(counts)):
+                self.trials[band][arm] += int(counts[band, arm])
+
+    def record_trial(self, band: int, arm: int):
+        with self._lock:
+            self.trials[band][arm] += 1
+
+    def record_success(self, band: int, arm: int):
+        with self._lock:
+            self.successes[band][arm] += 1
+
+    def expected_rates(self, band: int) -> List[float]:
+        """Posterior mean success rate of each arm in a band"""
+        return [
+            (alpha + s) / (alpha + beta + t)
+            for alpha, beta, s, t in zip(self.prior_alpha, self.prior_beta, self.successes[band], self.trials[band])
+        ]
@@ -0,0 +1,116 @@
+"""Rate limiting for intervention delivery"""
+import threading
+import time
+from typing import Dict, Optional, Set
+
+from config.settings import (
+    INTERVENTION_BURST, INTERVENTION_COOLDOWN_SECONDS, INTERVENTION_DEDUPE_SECONDS, INTERVENTION_REFILL_SECONDS
+)
+
+
+class UserBudget:
+    """Token bucket, cooldown and last send time per offer type for one user"""
+
+    __slots__ = ('tokens', 'updated_at', 'cooldown_until', 'last_sent')
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated_at = now
+        self.cooldown_until = 0.0
+        # offer type -> last time it was sent; bounded by the number of offer types
+        self.last_sent: Dict[str, float] = {}
+
+
+class InterventionScheduler:
+    """Decides whether a user may receive another intervention
+
+    Each user gets a token bucket of `burst` offers refilled one token per
+    refill_seconds, a cooldown after every offer, and a dedupe window per
+    offer type. Callers may check ready() before any template work, then
+    claim the offer with try_acquire(), which checks and charges under one
+    lock so concurrent senders can't both get through; both are amortized
+    O(1). Budgets that have
+    fully recovered behave exactly like new ones, so they are dropped in a
+    sweep whenever the number of budgets doubles.
+    """
+
+    def __init__(self, cooldown: float = INTERVENTION_COOLDOWN_SECONDS, burst: int = INTERVENTION_BURST,
+                 refill_seconds: float = INTERVENTION_REFILL_SECONDS,
+                 dedupe_window: float = INTERVENTION_DEDUPE_SECONDS):
+        self.cooldown = cooldown
+        self.burst = burst
+        self.refill_seconds = refill_seconds
+        self.dedupe_window = dedupe_window
+        self._budgets: Dict[str, UserBudget] = {}
+        self._prune_at = 64
+        self._lock = threading.Lock()
+
+    def _budget(self, user_id: str, now: float) -> UserBudget:
+        budget = self._budgets.get(user_id)
+        if budget is None:
+            if len(self._budgets) >= self._prune_at:
+                self._prune(now)
+            budget = self._budgets[user_id] = UserBudget(self.burst, now)
+        else:
+            budget.tokens = min(self.burst, budget.tokens + (now - budget.updated_at) / self.refill_seconds)
+            budget.updated_at = now
+        return budget
+
+    def _prune(self, now: float):
+        """Drop budgets with a full bucket and no cooldown or dedupe window left"""
+        idle = [
+            user_id for user_id, budget in self._budgets.items()
+            if budget.tokens + (now - budget.updated_at) / self.refill_seconds >= self.burst
+            and now >= budget.cooldown_until
+            and all(now - sent_at >= self.dedupe_window for sent_at in budget.last_sent.values())
+        ]
+        for user_id in idle:
+            del self._budgets[user_id]
+        self._prune_at = max(2 * len(self._budgets), 64)
+
+    def ready(self, user_id: str, now: Optional[float] = None) -> bool:
+        """Whether the user is out of cooldown and has a token to spend"""
+        now = time.time() if now is None else now
+        with self._lock:
+            budget = self._budget(user_id, now)
+            return now >= budget.cooldown_until and budget.tokens >= 1
+
+    def recent_types(self, user_id: str, now: Optional[float] = None) -> Set[str]:
+        """Offer types sent to the user within the dedupe window"""
+        now = time.time() if now is None else now
+        with self._lock:
+            budget = self._budgets.get(user_id)
+            if budget is None:
+                return set()
+            return {
+                offer_type for offer_type, sent_at in budget.last_sent.items()
+                if now - sent_at < self.dedupe_window
+            }
+
+    def try_acquire(self, user_id: str, offer_type: str, now: Optional[float] = None) -> bool:
+        """Charge the user for offer_type if it may be sent now; False leaves the budget untouched"""
+        now = time.time() if now is None else now
+        with self._lock:
+            budget = self._budget(user_id, now)
+            if now < budget.cooldown_until or budget.tokens < 1:
+                return False
+            sent_at = budget.last_sent.get(offer_type)
+            if sent_at is not None and now - sent_at < self.dedupe_window:
+                return False
+            self._charge(budget, offer_type, now)
+            return True
+
+    def record(self, user_id: str, offer_type: str, now: Optional[float] = None):
+        """Charge the user for an intervention that was sent"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._charge(self._budget(user_id, now), offer_type, now)
+
+    def _charge(self, budget: UserBudget, offer_type: str, now: float):
+        budget.tokens = max(budget.tokens - 1, 0.0)
+        budget.cooldown_until = now + self.cooldown
+        budget.last_sent[offer_type] = now
+
+    def forget(self, user_id: str):
+        with self._lock:
+            self._budgets.pop(user_id, None)
@@ -1,12 +1,88 @@
 """Intervention management service"""
-import random
+import threading
+import time
+import uuid
+from collections.abc import Sequence
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Callable, Collection, Dict, Optional
+
+import numpy as np
+
+from config.settings import ABANDONMENT_THRESHOLD, INTERVENTION_TYPES
+from services.intervention_bandit import InterventionBandit
+from services.intervention_scheduler import InterventionScheduler
+from services.intervention_stats import InterventionStats
+
+class InterventionBatch(Sequence):
+    """Interventions generated together, stored column-wise
+
+    Offers, savings and ids are arrays; an intervention dict (including
+    its formatted message) is only built when an item is read, so a batch
+    can be queued for delivery without formatting thousands of messages.
+    Built dicts are kept, so every read of an item returns the same dict
+    and apply_intervention() sees whether it was already applied.
+    """
+
+    def __init__(self, service: 'InterventionService', id_prefix: str, first_seq: int,
+                 user_ids: Sequence, cart_values: np.ndarray, arms: np.ndarray, bands: np.ndarray,
+                 savings: np.ndarray, timestamp: datetime):
+        self.service = service
+        self.id_prefix = id_prefix
+        self.first_seq = first_seq
+        self.user_ids = user_ids
+        self.cart_values = cart_values
+        self.arms = arms
+        self.bands = bands
+        self.savings = savings
+        self.timestamp = timestamp
+        self._built: Dict[int, Dict] = {}
+
+    def __len__(self):
+        return len(self.arms)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        intervention = self._built.get(index)
+        if intervention is None:
+            # setdefault so concurrent first reads still share one dict
+            intervention = self._built.setdefault(index, self._build(index))
+        return intervention
+
+    def _build(self, index: int) -> Dict:
+        arm = int(self.arms[index])
+        template = self.service.intervention_types[arm]
+        intervention = {
+            'id': f"{self.id_prefix}{self.first_seq + index:x}",
+            'type': template['type'],
+            'message': template['message'],
+            'value': template['value'],
+            'cart_value': float(self.cart_values[index]),
+            'timestamp': self.timestamp,
+            'success': False,
+            'user_id': self.user_ids[index],
+            'arm': arm,
+            'band': int(self.bands[index])
+        }
+        if self.savings[index] > 0:
+            intervention['savings'] = float(self.savings[index])
+            intervention['message'] += f" Save ₹{intervention['savings']:,.0f} on your order!"
+        return intervention
+
 
 class InterventionService:
     """Handle cart abandonment interventions"""
     
     def __init__(self):
+        self.stats = InterventionStats()
+        # Ids are INT_<instance prefix><sequence in hex>: unique across calls, batches and workers
+        self._id_prefix = f"INT_{uuid.uuid4().hex[:8]}_"
+        self._next_id = 0
+        self._id_lock = threading.Lock()
         self.intervention_types = [
             {
                 'type': 'discount',
@@ -34,26 +110,48 @@ class InterventionService:
                 'value': 10
             }
         ]
+        # Each offer starts from the configured weight of its type
+        type_weights = {t['type']: t['weight'] for t in INTERVENTION_TYPES}
+        self.bandit = InterventionBandit(
+            [t['type'] for t in self.intervention_types],
+            [type_weights.get(t['type'], 0.5) for t in self.intervention_types]
+        )
     
     def should_trigger_intervention(self, prediction: Dict) -> bool:
         """Determine if intervention should be triggered"""
         if not prediction:
             return False
-        return prediction.get('probability', 0) > 0.6
+        return prediction.get('probability', 0) > ABANDONMENT_THRESHOLD
     
-    def generate_intervention(self, cart_value: float, user_data: Dict) -> Dict:
-        """Generate an intervention based on cart and user data"""
-        intervention_template = random.choice(self.intervention_types)
+    def generate_intervention(self, cart_value: float, user_data: Dict,
+                              exclude_types: Collection[str] = (),
+                              acquire: Optional[Callable[[str], bool]] = None) -> Optional[Dict]:
+        """Generate an intervention based on cart and user data, skipping excluded offer types
+        
+        acquire, e.g. InterventionScheduler.try_acquire bound to the user, is
+        called with the chosen offer type; if it returns False nothing is
+        generated or counted.
+        """
+        band = self.bandit.band(cart_value)
+        arm = self.bandit.select(band, exclude_types)
+        if arm is None:
+            return None
+        intervention_template = self.intervention_types[arm]
+        if acquire is not None and not acquire(intervention_template['type']):
+            return None
+        self.bandit.record_trial(band, arm)
         
         intervention = {
-            'id': f"INT_{int(datetime.now().timestamp())}",
+            'id': f"{self._id_prefix}{self._reserve_ids(1):x}",
             'type': intervention_template['type'],
             'message': intervention_template['message'],
             'value': intervention_template['value'],
             'cart_value': cart_value,
             'timestamp': datetime.now(),
             'success': False,
-            'user_id': user_data.get('id', 'unknown')
+            'user_id': user_data.get('id', 'unknown'),
+            'arm': arm,
+            'band': band
         }
         
         # Customize message based on cart value
@@ -62,30 +160,82 @@ class InterventionService:
             intervention['savings'] = savings
             intervention['message'] += f" Save ₹{savings:,.0f} on your order!"
         
+        self.stats.record_generated(intervention)
         return intervention
     
+    def generate_batch(self, cart_values, user_ids: Sequence,
+                       scheduler: Optional[InterventionScheduler] = None,
+                       now: Optional[float] = None) -> InterventionBatch:
+        """Generate one intervention per at-risk session in a single vectorized pass
+
+        cart_values and user_ids are parallel; offers are chosen by the
+        bandit per cart-value band and discount savings are computed as
+        arrays. Items of the returned batch behave like
+        generate_intervention() results. With a scheduler, users out of
+        budget are skipped before offers are chosen and each chosen offer
+        must pass try_acquire(), so the batch may be shorter than its input
+        and its user_ids say who it covers.
+        """
+        cart_values = np.asarray(cart_values, dtype=np.float64)
+        if len(user_ids) != len(cart_values):
+            raise ValueError(f"Got {len(user_ids)} user ids for {len(cart_values)} cart values")
+        if scheduler is not None:
+            now = time.time() if now is None else now
+            ready = np.fromiter((scheduler.ready(user_id, now) for user_id in user_ids), dtype=bool,
+                                count=len(user_ids))
+            user_ids = [user_ids[i] for i in np.flatnonzero(ready).tolist()]
+            cart_values = cart_values[ready]
+
+        bands = np.searchsorted(self.bandit.band_edges, cart_values, side='right')
+        arms = self.bandit.select_batch(bands)
+        if scheduler is not None:
+            # Dedupe windows are per offer type, so they can only be checked once offers are chosen
+            acquired = np.fromiter(
+                (scheduler.try_acquire(user_id, self.intervention_types[arm]['type'], now)
+                 for user_id, arm in zip(user_ids, arms.tolist())),
+                dtype=bool, count=len(user_ids)
+            )
+            user_ids = [user_ids[i] for i in np.flatnonzero(acquired).tolist()]
+            cart_values, bands, arms = cart_values[acquired], bands[acquired], arms[acquired]
+        self.bandit.record_trials(bands, arms)
+
+        is_discount = np.array([t['type'] == 'discount' for t in self.intervention_types])
+        percent = np.array([t['value'] for t in self.intervention_types], dtype=np.float64)
+        savings = np.where(is_discount[arms] & (cart_values > 0), cart_values * percent[arms] / 100, 0.0)
+
+        timestamp = datetime.now()
+        arm_counts = np.bincount(arms, minlength=len(self.intervention_types))
+        type_counts: Dict[str, int] = {}
+        for template, count in zip(self.intervention_types, arm_counts.tolist()):
+            if count:
+                type_counts[template['type']] = type_counts.get(template['type'], 0) + count
+        self.stats.record_generated_batch(type_counts, timestamp.timestamp())
+
+        return InterventionBatch(self, self._id_prefix, self._reserve_ids(len(arms)), user_ids,
+                                 cart_values, arms, bands, savings, timestamp)
+    
+    def _reserve_ids(self, count: int) -> int:
+        """First of `count` consecutive id sequence numbers"""
+        with self._id_lock:
+            first = self._next_id
+            self._next_id += count
+            return first
+    
     def apply_intervention(self, intervention: Dict) -> Dict:
         """Mark intervention as successfully applied"""
+        if intervention['success']:
+            return intervention
+        self.stats.record_applied(intervention)
+        if 'arm' in intervention:
+            self.bandit.record_success(intervention['band'], intervention['arm'])
         intervention['success'] = True
         intervention['applied_at'] = datetime.now()
         return intervention
     
-    def get_intervention_stats(self, interventions: List[Dict]) -> Dict:
-        """Get statistics about interventions"""
-        if not interventions:
-            return {
-                'total': 0,
-                'successful': 0,
-                'success_rate': 0,
-                'total_savings': 0
-            }
-        
-        successful = [i for i in interventions if i.get('success', False)]
-        total_savings = sum(i.get('savings', 0) for i in successful)
-        
-        return {
-            'total': len(interventions),
-            'successful': len(successful),
-            'success_rate': len(successful) / len(interventions) * 100,
-            'total_savings': total_savings
-        }
\ No newline at end of file
+    def get_intervention_stats(self, window: Optional[float] = None) -> Dict:
+        """Totals, successes, success rate and savings, over all time or the last `window` seconds"""
+        return self.stats.summary(window)
+    
+    def get_intervention_stats_by_type(self, window: Optional[float] = None) -> Dict[str, Dict]:
+        """get_intervention_stats() per offer type"""
+        return self.stats.by_type(window)
@@ -0,0 +1,142 @@
+"""Running intervention statistics and an append-only intervention log"""
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterator, List, Optional
+
+from config.settings import INTERVENTION_STATS_BUCKET_SECONDS, INTERVENTION_STATS_RETENTION_BUCKETS
+
+
+class Tally:
+    """Counts and savings for one slice of interventions"""
+
+    __slots__ = ('total', 'successful', 'savings')
+
+    def __init__(self):
+        self.total = 0
+        self.successful = 0
+        self.savings = 0.0
+
+    def merge(self, other: 'Tally'):
+        self.total += other.total
+        self.successful += other.successful
+        self.savings += other.savings
+
+    def to_dict(self) -> Dict:
+        return {
+            'total': self.total,
+            'successful': self.successful,
+            'success_rate': self.successful / self.total * 100 if self.total else 0,
+            'total_savings': self.savings,
+        }
+
+
+class InterventionStats:
+    """Per-type and per-time-bucket tallies, updated in O(1) per event
+
+    Interventions count towards the bucket of the time they were generated,
+    so a window's success rate is the share of offers made in that window
+    that were applied. Buckets older than the retention are dropped.
+    """
+
+    def __init__(self, bucket_seconds: int = INTERVENTION_STATS_BUCKET_SECONDS,
+                 retention: int = INTERVENTION_STATS_RETENTION_BUCKETS):
+        self.bucket_seconds = bucket_seconds
+        self.retention = retention
+        self._by_type: Dict[str, Tally] = {}
+        # bucket start -> offer type -> tally, with starts in order for expiry
+        self._buckets: Dict[int, Dict[str, Tally]] = {}
+        self._bucket_order = deque()
+        self._lock = threading.Lock()
+
+    def _bucket(self, timestamp: float) -> Optional[Dict[str, Tally]]:
+        start = int(timestamp // self.bucket_seconds) * self.bucket_seconds
+        bucket = self._buckets.get(start)
+        if bucket is None:
+            if self._bucket_order and start < self._bucket_order[-1]:
+                return None  # older than the newest bucket and already expired or never seen
+            bucket = self._buckets[start] = {}
+            self._bucket_order.append(start)
+            while len(self._bucket_order) > self.retention:
+                del self._buckets[self._bucket_order.popleft()]
+        return bucket
+
+    def _tallies(self, intervention: Dict) -> List[Tally]:
+        offer_type = intervention['type']
+        tallies = [self._by_type.setdefault(offer_type, Tally())]
+        bucket = self._bucket(intervention['timestamp'].timestamp())
+        if bucket is not None:
+            tallies.append(bucket.setdefault(offer_type, Tally()))
+        return tallies
+
+    def record_generated(self, intervention: Dict):
+        with self._lock:
+            for tally in self._tallies(intervention):
+                tally.total += 1
+
+    def record_generated_batch(self, counts: Dict[str, int], timestamp: float):
+        """Count many interventions generated at once, given per-type counts"""
+        with self._lock:
+            bucket = self._bucket(timestamp)
+            for offer_type, count in counts.items():
+                self._by_type.setdefault(offer_type, Tally()).total += count
+                if bucket is not None:
+                    bucket.setdefault(offer_type, Tally()).total += count
+
+    def record_applied(self, intervention: Dict):
+        with self._lock:
+            for tally in self._tallies(intervention):
+                tally.successful += 1
+                tally.savings += intervention.get('savings', 0)
+
+    def by_type(self, window: Optional[float] = None, now: Optional[float] = None) -> Dict[str, Dict]:
+        """Stats per offer type, over all time or the last `window` seconds
+
+        Windows are rounded out to whole buckets.
+        """
+        with self._lock:
+            if window is None:
+                return {offer_type: tally.to_dict() for offer_type, tally in self._by_type.items()}
+
+            now = time.time() if now is None else now
+            since = now - window - self.bucket_seconds
+            merged: Dict[str, Tally] = {}
+            for start in reversed(self._bucket_order):
+                if start <= since:
+                    break
+                for offer_type, tally in self._buckets[start].items():
+                    merged.setdefault(offer_type, Tally()).merge(tally)
+            return {offer_type: tally.to_dict() for offer_type, tally in merged.items()}
+
+    def summary(self, window: Optional[float] = None, now: Optional[float] = None) -> Dict:
+        """Stats over every offer type"""
+        total = Tally()
+        for stats in self.by_type(window, now).values():
+            total.total += stats['total']
+            total.successful += stats['successful']
+            total.savings += stats['total_savings']
+        return total.to_dict()
+
+
+class InterventionLog:
+    """Append-only list of interventions, read back a page at a time"""
+
+    def __init__(self, entries: Optional[List[Dict]] = None):
+        self._entries: List[Dict] = list(entries or [])
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self._entries)
+
+    def append(self, intervention: Dict):
+        self._entries.append(intervention)
+
+    def extend(self, interventions: List[Dict]):
+        self._entries.extend(interventions)
+
+    def page(self, page: int, per_page: int) -> List[Dict]:
+        """Entries on a page, newest first"""
+        end = len(self._entries) - page * per_page
+        return self._entries[max(end - per_page, 0):max(end, 0)][::-1]
@@ -0,0 +1,57 @@
+"""Cart totals and how the app renders them"""
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from services.cart_service import Cart, CartItem, CartService
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+
+def product(product_id, price):
+    return {'id': product_id, 'name': product_id, 'price': price, 'image': ''}
+
+
+def test_whole_rupee_subtotal_is_an_int():
+    cart = Cart([CartItem(product('laptop', 99999)), CartItem(product('cable', 0.1), 3)])
+    cart.remove('cable')
+    assert cart.subtotal == 99999
+    assert isinstance(cart.subtotal, int)
+    assert f"₹{cart.subtotal:,}" == "₹99,999"
+
+
+def test_subtotal_does_not_drift():
+    cart = Cart()
+    for index in range(50):
+        cart.add(CartItem(product(str(index), 0.1), 3))
+    assert cart.subtotal == 15
+    for index in range(50):
+        cart.remove(str(index))
+    assert cart.subtotal == 0
+    assert cart.shipping_progress()['progress'] == 0
+
+
+def test_add_to_cart_reports_cart_limits():
+    service = CartService()
+    service.max_cart_items = 2
+    service.max_quantity_per_item = 2
+    cart = service.new_cart()
+    service.add_to_cart(cart, product('a', 10))
+    service.add_to_cart(cart, product('b', 10))
+    with pytest.raises(ValueError, match="at most 2 products"):
+        service.add_to_cart(cart, product('c', 10))
+    service.add_to_cart(cart, product('a', 10))
+    with pytest.raises(ValueError, match="at most 2 of a"):
+        service.add_to_cart(cart, product('a', 10))
+    assert [(item.id, item.quantity) for item in cart] == [('a', 2), ('b', 1)]
+
+
+def test_cart_value_renders_without_decimals():
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.session_state['cart'] = Cart([CartItem(product('laptop', 99999))])
+    at.run()
+    at.sidebar.radio(key='nav_radio').set_value("📊 Dashboard").run()
+    assert not at.exception
+    cart_value = next(metric for metric in at.metric if metric.label == "Cart Value")
+    assert cart_value.value == "₹99,999"